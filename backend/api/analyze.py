@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import anthropic
+import httpx
+
+from cache import LRUCache
+from metrics import stage
+
+# Bump when the prompt or the reply format changes, so cached analyses
+# from an older prompt are not served
+PROMPT_VERSION = "1"
+
+DEFAULT_MODEL = 'claude-3-5-sonnet-latest'
+
+SYSTEM_PROMPT = """You review components of a resume: job blocks (company, title, location, \
+date range and bullets) or single bullets. For each component, rate how strong it is for a \
+recruiter from 0 to 100, explain the rating in one or two sentences, and give up to three \
+concrete suggestions (stronger verbs, quantified impact, tighter wording).
+
+The components are given as a JSON list of {"index": n, "component": {...}}. Reply with JSON \
+only, no prose or code fences, in this shape:
+{"results": [{"index": n, "score": 0-100, "feedback": "...", "suggestions": ["..."]}]}
+with one result per component."""
+
+# Reply tokens allowed per component in a call, plus a fixed allowance
+TOKENS_PER_COMPONENT = 320
+BASE_TOKENS = 256
+
+
+class AnalysisUnavailableError(Exception):
+    """Raised when no Anthropic API key is configured."""
+
+
+class AnalysisError(Exception):
+    """Raised when the model call fails or its reply cannot be used."""
+
+
+def _normalize(value: Any) -> Any:
+    """Drop ids and collapse whitespace so equivalent components compare equal."""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k != 'id'}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    return value
+
+
+def component_key(component: Dict[str, Any]) -> str:
+    """Cache key for a component: a hash of its normalized content plus the prompt version."""
+    canonical = json.dumps(_normalize(component), ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return f"{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}:p{PROMPT_VERSION}"
+
+
+def _clean_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        score = max(0, min(100, int(result.get('score', 0))))
+    except (TypeError, ValueError):
+        score = 0
+    suggestions = result.get('suggestions') or []
+    if not isinstance(suggestions, list):
+        suggestions = [suggestions]
+    return {
+        'score': score,
+        'feedback': str(result.get('feedback', '')),
+        'suggestions': [str(s) for s in suggestions][:3],
+    }
+
+
+def parse_reply(text: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Read the model's JSON reply for a call with count components.
+
+    Returns:
+        One cleaned result per component, in call order (None where the
+        reply has no result for it)
+
+    Raises:
+        AnalysisError: If the reply is not the expected JSON
+    """
+    # Models sometimes wrap JSON in a code fence despite the instructions
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    try:
+        results = json.loads(match.group(0))['results'] if match else None
+    except (ValueError, KeyError, TypeError):
+        results = None
+    if not isinstance(results, list):
+        raise AnalysisError("Model reply is not valid analysis JSON")
+
+    by_index: List[Optional[Dict[str, Any]]] = [None] * count
+    for position, result in enumerate(results):
+        if not isinstance(result, dict):
+            continue
+        index = result.get('index', position)
+        if isinstance(index, int) and 0 <= index < count:
+            by_index[index] = _clean_result(result)
+    return by_index
+
+
+class ComponentAnalyzer:
+    """
+    Analyzes resume components with Claude.
+
+    One pooled async client is shared by all requests and at most
+    max_concurrency calls are in flight. Results are cached by normalized
+    component content and prompt version, concurrent requests for the same
+    component share one analysis, and uncached components are sent up to
+    batch_size per call, so a whole resume costs a few calls rather than
+    one per bullet.
+
+    Args:
+        cache: Analyses by component key
+        model: Claude model name
+        max_concurrency: Most model calls in flight at once
+        batch_size: Most components analyzed in one call
+        timeout: Seconds before a model call times out
+        max_retries: Retries of a call on connection errors, 429s and 5xxs
+        base_url: API base URL (default: ANTHROPIC_BASE_URL or the public API)
+    """
+
+    def __init__(
+        self,
+        cache: LRUCache,
+        model: str = DEFAULT_MODEL,
+        max_concurrency: int = 4,
+        batch_size: int = 20,
+        timeout: float = 60.0,
+        max_retries: int = 2,
+        base_url: Optional[str] = None,
+    ):
+        self.cache = cache
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self._client: Optional[anthropic.AsyncAnthropic] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.calls = 0
+        self.errors = 0
+
+    def _get_client(self) -> Tuple[anthropic.AsyncAnthropic, asyncio.Semaphore]:
+        # Created on first use so both belong to the server's event loop
+        if self._client is None:
+            api_key = os.environ.get('ANTHROPIC_API_KEY')
+            if not api_key:
+                raise AnalysisUnavailableError("ANTHROPIC_API_KEY is not set")
+            self._client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=httpx.AsyncClient(limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                )),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client, self._semaphore
+
+    def prepare(self) -> bool:
+        """
+        Create the API client ahead of the first analysis, since loading
+        its TLS certificates takes a noticeable fraction of a second.
+
+        Returns:
+            False if no API key is configured
+        """
+        try:
+            self._get_client()
+        except AnalysisUnavailableError:
+            return False
+        return True
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._semaphore = None
+
+    async def _call(self, components: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        client, semaphore = self._get_client()
+        prompt = json.dumps(
+            [{'index': i, 'component': _normalize(c)} for i, c in enumerate(components)],
+            ensure_ascii=False,
+        )
+        async with semaphore:
+            self.calls += 1
+            with stage('analyze'):
+                try:
+                    message = await client.messages.create(
+                        model=self.model,
+                        max_tokens=BASE_TOKENS + TOKENS_PER_COMPONENT * len(components),
+                        temperature=0,
+                        system=SYSTEM_PROMPT,
+                        messages=[{'role': 'user', 'content': prompt}],
+                    )
+                except anthropic.APIError as e:
+                    # The upstream error can echo request details; keep it in the server log
+                    print(f"Error calling the analysis model: {str(e)}")
+                    raise AnalysisError("Model call failed")
+        text = ''.join(block.text for block in message.content if block.type == 'text')
+        return parse_reply(text, len(components))
+
+    async def _run_batch(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Analyze one batch and resolve its in-flight futures with results or errors."""
+        try:
+            results = await self._call([component for _, component in batch])
+            for (key, _), result in zip(batch, results):
+                if result is None:
+                    self.errors += 1
+                    result = {'error': 'Model reply has no result for this component'}
+                else:
+                    self.cache.put(key, result)
+                self._inflight[key].set_result(result)
+        except Exception as e:
+            print(f"Error analyzing components: {str(e)}")
+            self.errors += len(batch)
+            error = str(e) if isinstance(e, AnalysisError) else 'Analysis failed'
+            for key, _ in batch:
+                future = self._inflight[key]
+                if not future.done():
+                    future.set_result({'error': error})
+        finally:
+            # Never leave waiters hanging, e.g. when this request is cancelled
+            for key, _ in batch:
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.set_result({'error': 'Analysis was cancelled'})
+
+    async def analyze_many(self, components: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analyze components, batching the uncached ones into as few calls as possible.
+
+        Returns:
+            One result per component, in order: {'score', 'feedback',
+            'suggestions'}, or {'error'} for a component that could not be
+            analyzed
+
+        Raises:
+            AnalysisUnavailableError: If uncached components need a model
+                call and no API key is configured
+        """
+        keys = [component_key(c) for c in components]
+        resolved: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        todo: List[Tuple[str, Dict[str, Any]]] = []
+
+        for key, component in zip(keys, components):
+            if key in resolved or key in waiting:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                resolved[key] = cached
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting[key] = self._inflight[key]
+            else:
+                todo.append((key, component))
+
+        if todo:
+            # Fail fast, before any future is registered
+            self._get_client()
+            self.misses += len(todo)
+            loop = asyncio.get_running_loop()
+            for key, _ in todo:
+                self._inflight[key] = waiting[key] = loop.create_future()
+            batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+            await asyncio.gather(*(self._run_batch(batch) for batch in batches))
+
+        for key, future in waiting.items():
+            resolved[key] = await asyncio.shield(future)
+
+        return [resolved[key] for key in keys]
+
+    async def analyze(self, component: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze one component.
+
+        Raises:
+            AnalysisUnavailableError: If no API key is configured
+            AnalysisError: If the component could not be analyzed
+        """
+        result = (await self.analyze_many([component]))[0]
+        if 'error' in result:
+            raise AnalysisError(result['error'])
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'calls': self.calls,
+            'componentsPerCall': round(self.misses / self.calls, 2) if self.calls else 0.0,
+            'errors': self.errors,
+            'entries': len(self.cache),
+            'evictions': self.cache.evictions,
+        }
+
+
+def create_component_analyzer() -> ComponentAnalyzer:
+    """Build the analyzer from ANALYZE_* environment variables."""
+    return ComponentAnalyzer(
+        cache=LRUCache(
+            max_entries=int(os.environ.get('ANALYZE_CACHE_ENTRIES', 4096)),
+            max_bytes=int(os.environ.get('ANALYZE_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+            max_age=float(os.environ.get('ANALYZE_CACHE_TTL', 24 * 60 * 60)),
+            sizeof=lambda value: len(json.dumps(value)),
+        ),
+        model=os.environ.get('ANALYZE_MODEL', DEFAULT_MODEL),
+        max_concurrency=int(os.environ.get('ANALYZE_MAX_CONCURRENCY', 4)),
+        batch_size=int(os.environ.get('ANALYZE_BATCH_SIZE', 20)),
+        timeout=float(os.environ.get('ANALYZE_TIMEOUT', 60)),
+        max_retries=int(os.environ.get('ANALYZE_MAX_RETRIES', 2)),
+    )
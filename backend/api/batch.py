@@ -0,0 +1,191 @@
+import asyncio
+import os
+import time
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+
+from jobs import QueueFullError, percentile
+
+# Largest single PDF accepted in a batch (checked before a ZIP entry is read)
+BATCH_MAX_FILE_BYTES = int(os.environ.get('BATCH_MAX_FILE_BYTES', 20 * 1024 * 1024))
+
+# Times a file is retried when the parse queue is full before it is failed
+QUEUE_FULL_RETRIES = 3
+
+
+class BatchItem(NamedTuple):
+    """One PDF of a batch: read() returns its bytes, or error says why it was skipped."""
+    name: str
+    read: Optional[Callable[[], bytes]] = None
+    error: Optional[str] = None
+
+
+def _read_upload(upload: UploadFile) -> Callable[[], bytes]:
+    def read() -> bytes:
+        upload.file.seek(0)
+        content = upload.file.read(BATCH_MAX_FILE_BYTES + 1)
+        if len(content) > BATCH_MAX_FILE_BYTES:
+            raise ValueError(f"File is larger than {BATCH_MAX_FILE_BYTES} bytes")
+        return content
+    return read
+
+
+def _iter_archive(upload: UploadFile) -> Iterator[BatchItem]:
+    """Yield the PDFs in an uploaded ZIP without extracting any of them yet."""
+    try:
+        archive = zipfile.ZipFile(upload.file)
+    except zipfile.BadZipFile:
+        yield BatchItem(upload.filename, error="Not a valid ZIP archive")
+        return
+
+    for info in archive.infolist():
+        name = info.filename
+        base = os.path.basename(name)
+        # Skip folders and the metadata macOS adds to archives
+        if info.is_dir() or name.startswith('__MACOSX/') or base.startswith('.'):
+            continue
+        if not name.lower().endswith('.pdf'):
+            yield BatchItem(name, error="Only PDF files are supported")
+        elif info.file_size > BATCH_MAX_FILE_BYTES:
+            yield BatchItem(name, error=f"File is larger than {BATCH_MAX_FILE_BYTES} bytes")
+        else:
+            yield BatchItem(name, read=lambda info=info: archive.read(info))
+
+
+def iter_batch_items(uploads: Iterable[UploadFile]) -> Iterator[BatchItem]:
+    """
+    Yield one BatchItem per PDF in the uploads, expanding ZIP archives.
+    Nothing is read into memory until an item's read() is called.
+    """
+    for upload in uploads:
+        name = upload.filename or ''
+        if name.lower().endswith('.zip'):
+            yield from _iter_archive(upload)
+        elif name.lower().endswith('.pdf'):
+            yield BatchItem(name, read=_read_upload(upload))
+        else:
+            yield BatchItem(name, error="Only PDF and ZIP files are supported")
+
+
+async def _parse_item(
+    index: int,
+    item: BatchItem,
+    parse: Callable[[bytes], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    event: Dict[str, Any] = {'index': index, 'file': item.name}
+    try:
+        if item.error:
+            raise ValueError(item.error)
+
+        content = await run_in_threadpool(item.read)
+        for attempt in range(QUEUE_FULL_RETRIES + 1):
+            try:
+                result = await parse(content)
+                break
+            except QueueFullError as e:
+                if attempt == QUEUE_FULL_RETRIES:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+        if 'error' in result:
+            raise ValueError(result['error'])
+        event.update(type='result', blocks=result['blocks'])
+    except Exception as e:
+        event.update(type='error', error=str(e))
+
+    event['seconds'] = round(time.perf_counter() - started, 4)
+    return event
+
+
+async def iter_windowed(
+    items: Iterable[Any],
+    start: Callable[[int, Any], Awaitable[Dict[str, Any]]],
+    concurrency: int,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run start(index, item) for each item with at most `concurrency` in
+    flight, and yield what each returns as soon as it finishes.
+
+    Items are pulled from the iterable only as slots free up, so memory use
+    depends on concurrency rather than on the number of items. Work still
+    in flight is cancelled when the generator is closed early.
+    """
+    items = iter(items)
+    pending = set()
+    next_index = 0
+
+    try:
+        while True:
+            while len(pending) < concurrency:
+                item = next(items, None)
+                if item is None:
+                    break
+                pending.add(asyncio.ensure_future(start(next_index, item)))
+                next_index += 1
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # The client went away: stop work that nobody will read
+        for task in pending:
+            task.cancel()
+
+
+def batch_summary(started: float, files: int, latencies: List[float]) -> Dict[str, Any]:
+    """
+    Throughput and latency figures for a finished batch.
+
+    Args:
+        started: time.perf_counter() when the batch started
+        files: Number of items processed
+        latencies: Seconds taken by each item that succeeded
+    """
+    elapsed = time.perf_counter() - started
+    return {
+        'files': files,
+        'succeeded': len(latencies),
+        'failed': files - len(latencies),
+        'seconds': round(elapsed, 4),
+        'filesPerSecond': round(files / elapsed, 2) if elapsed else 0.0,
+        'latency': {
+            'p50': round(percentile(latencies, 50), 4),
+            'p95': round(percentile(latencies, 95), 4),
+        },
+    }
+
+
+async def iter_batch_results(
+    items: Iterable[BatchItem],
+    parse: Callable[[bytes], Awaitable[Dict[str, Any]]],
+    concurrency: int,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parse batch items with at most `concurrency` in flight and yield each
+    file's result (or error) as soon as it finishes, then a summary with
+    throughput and per-file latency percentiles.
+
+    Only in-flight files are held in memory, so memory use depends on
+    concurrency rather than on the size of the batch.
+    """
+    started = time.perf_counter()
+    latencies: List[float] = []
+    files = 0
+
+    events = iter_windowed(items, lambda index, item: _parse_item(index, item, parse), concurrency)
+    try:
+        async for event in events:
+            files += 1
+            if event['type'] == 'result':
+                latencies.append(event['seconds'])
+            yield event
+    finally:
+        await events.aclose()
+
+    yield {'type': 'summary', **batch_summary(started, files, latencies)}
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import posixpath
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from batch import batch_summary, iter_windowed
+
+# Most resumes accepted in one bulk export
+BULK_EXPORT_MAX_ITEMS = int(os.environ.get('BULK_EXPORT_MAX_ITEMS', 1000))
+
+
+class ExportItem(NamedTuple):
+    """One resume of a bulk export: resume is the payload, or error says why it was rejected."""
+    name: str
+    resume: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def _init_worker() -> None:
+    """Import export in each worker so styles and fonts are built before the first render."""
+    import export  # noqa: F401
+
+
+def _render_in_worker(resume: Dict[str, Any]) -> bytes:
+    from export import render_resume_pdf
+
+    return render_resume_pdf(resume)
+
+
+class ExportWorkerPool:
+    """
+    Renders resume PDFs in worker processes, so a bulk export uses every
+    core instead of running reportlab on the event loop's one.
+
+    Args:
+        workers: Number of worker processes
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def warm_up(self, resume: Dict[str, Any]) -> None:
+        """Start the worker processes and render resume once per worker."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _render_in_worker, resume) for _ in range(self.workers)
+        ))
+
+    async def render(self, resume: Dict[str, Any]) -> bytes:
+        self.start()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, _render_in_worker, resume)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next render
+            self.shutdown()
+            raise
+
+
+def entry_name(name: Optional[str], index: int, used: Set[str]) -> str:
+    """
+    A safe, unique .pdf file name for a ZIP entry.
+
+    Args:
+        name: Requested name, if any (directories are stripped)
+        index: 0-based position in the export, used when name is empty
+        used: Names already in the archive; the result is added to it
+    """
+    base = posixpath.basename((name or '').replace('\\', '/')).strip()
+    if not base or base in ('.', '..'):
+        base = f"resume-{index + 1:03d}"
+    if not base.lower().endswith('.pdf'):
+        base += '.pdf'
+
+    candidate = base
+    suffix = 2
+    while candidate in used:
+        candidate = f"{base[:-4]}-{suffix}.pdf"
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+class _ZipSink:
+    """
+    Write-only file object for zipfile that keeps what is written until it
+    is drained, so the archive can be streamed entry by entry. zipfile sees
+    that it cannot seek and writes data descriptors instead.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def _render_item(
+    index: int,
+    item: ExportItem,
+    render: Callable[[Dict[str, Any]], Awaitable[bytes]],
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    entry: Dict[str, Any] = {'index': index, 'file': item.name}
+    try:
+        if item.error:
+            raise ValueError(item.error)
+        entry['pdf'] = await render(item.resume)
+        entry['status'] = 'ok'
+    except Exception as e:
+        entry.update(status='error', error=str(e))
+    entry['seconds'] = round(time.perf_counter() - started, 4)
+    return entry
+
+
+async def iter_bulk_export(
+    items: Iterable[ExportItem],
+    render: Callable[[Dict[str, Any]], Awaitable[bytes]],
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    """
+    Render resumes with at most `concurrency` in flight and yield a ZIP
+    archive in chunks, adding each PDF as soon as it is rendered.
+
+    A resume that fails to render does not stop the export; the archive
+    ends with a manifest.json listing every item's status, error and
+    timing, plus throughput figures.
+    """
+    started = time.perf_counter()
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    manifest: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+
+    entries = iter_windowed(items, lambda index, item: _render_item(index, item, render), concurrency)
+    try:
+        async for entry in entries:
+            pdf = entry.pop('pdf', None)
+            if pdf is not None:
+                # Deflating a PDF takes long enough to stall other requests
+                await run_in_threadpool(archive.writestr, entry['file'], pdf)
+                entry['bytes'] = len(pdf)
+                latencies.append(entry['seconds'])
+            manifest.append(entry)
+            yield sink.drain()
+    finally:
+        await entries.aclose()
+
+    summary = dict(
+        batch_summary(started, len(manifest), latencies),
+        items=sorted(manifest, key=lambda entry: entry['index']),
+    )
+    await run_in_threadpool(archive.writestr, 'manifest.json', json.dumps(summary, indent=2))
+    archive.close()
+    yield sink.drain()
+
+
+def create_export_pool() -> ExportWorkerPool:
+    """Build the bulk export pool from EXPORT_WORKERS."""
+    return ExportWorkerPool(workers=int(os.environ.get('EXPORT_WORKERS', min(4, os.cpu_count() or 1))))
@@ -0,0 +1,788 @@
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import chain, combinations
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from parse import PLACEHOLDER_BULLET
+
+# Bump when tokenizing, shingling or the file layout changes; index files
+# from another version are ignored and rebuilt as resumes are parsed
+INDEX_VERSION = 1
+MAGIC = b'RBIX'
+
+# MinHash signature length, split into LSH bands of ROWS values each. Two
+# bullets become near-duplicate candidates if any band matches, which is
+# likely above a Jaccard similarity of about (1 / BANDS) ** (1 / ROWS) = 0.5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Band tables hold (band key << ID_BITS | bullet id) in one sorted 64-bit value
+ID_BITS = 26
+ID_MASK = (1 << ID_BITS) - 1
+KEY_MASK = (1 << (64 - ID_BITS)) - 1
+MAX_BULLETS = 1 << ID_BITS
+# Largest prime that fits the band key bits
+BAND_KEY_PRIME = (1 << (64 - ID_BITS)) - 45
+
+# Only the rarest query terms are scored, which bounds search time
+MAX_QUERY_TERMS = 6
+# Most candidates compared exactly in a near-duplicate lookup
+MAX_CANDIDATES = 1000
+
+# Terms in at least 1 / DENSE_RATIO of the bullets of an index file also
+# get a bitmap there (no bigger than their posting list), so common words
+# are intersected as integers rather than as sets of millions of ids
+DENSE_RATIO = 32
+DENSE_MIN_BULLETS = 4096
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in', 'into', 'of',
+    'on', 'or', 'over', 'the', 'to', 'via', 'with',
+))
+
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}I')
+_SECTION_HEADER = struct.Struct('<Q')
+
+Record = Tuple[str, str, str]  # bullet id, document id, text
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def shingles(tokens: List[str]) -> Set[str]:
+    """Word pairs of a bullet (its single word if it has only one)."""
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def minhash(shingle_set: Set[str]) -> Optional[Tuple[int, ...]]:
+    """
+    MinHash signature of a shingle set, or None if it is empty.
+
+    Each shingle is hashed once with SHAKE-128 into NUM_PERM independent
+    32-bit values, so the per-position minimums are taken in C.
+    """
+    if not shingle_set:
+        return None
+    rows = [
+        _SIGNATURE.unpack(hashlib.shake_128(shingle.encode('utf-8')).digest(_SIGNATURE.size))
+        for shingle in shingle_set
+    ]
+    return tuple(map(min, zip(*rows)))
+
+
+def band_keys(signature: Tuple[int, ...]) -> List[int]:
+    """One key per LSH band: the band's ROWS values, as one integer, modulo a prime below 2**38."""
+    raw = _SIGNATURE.pack(*signature)
+    width = ROWS * 4
+    return [int.from_bytes(raw[i:i + width], 'little') % BAND_KEY_PRIME for i in range(0, len(raw), width)]
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def _lowest_bits(bits: int, exclude: Set[int], limit: int) -> List[int]:
+    """Positions of up to limit set bits of bits, lowest first, skipping exclude."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    found: List[int] = []
+    for match in NONZERO_BYTE.finditer(data):
+        byte, first = data[match.start()], match.start() << 3
+        for bit in range(8):
+            if byte >> bit & 1 and first + bit not in exclude:
+                found.append(first + bit)
+                if len(found) == limit:
+                    return found
+    return found
+
+
+class _DenseTerm:
+    """A common term's bullets: the index file's bitmap plus any newer ids."""
+
+    def __init__(self, bitmap: memoryview, count: int, mapped: int, newer: frozenset):
+        self.bitmap = bitmap
+        self.count = count
+        self.newer = newer
+        self._size = mapped + len(newer)
+        self._bits: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, bullet: int) -> bool:
+        if bullet < self.count:
+            return bool(self.bitmap[bullet >> 3] >> (bullet & 7) & 1)
+        return bullet in self.newer
+
+    def bits(self) -> int:
+        if self._bits is None:
+            bits = int.from_bytes(self.bitmap, 'little')
+            if self.newer:
+                extra = bytearray(((max(self.newer) - self.count) >> 3) + 1)
+                for bullet in self.newer:
+                    bullet -= self.count
+                    extra[bullet >> 3] |= 1 << (bullet & 7)
+                bits |= int.from_bytes(extra, 'little') << self.count
+            self._bits = bits
+        return self._bits
+
+
+def _intersect(terms: List[Any], exclude: Set[int], limit: int) -> List[int]:
+    """
+    Lowest limit bullet ids in every one of terms (frozensets or dense
+    terms) and not in exclude.
+    """
+    sparse = sorted((t for t in terms if isinstance(t, frozenset)), key=len)
+    dense = [t for t in terms if not isinstance(t, frozenset)]
+    if not sparse:
+        bits = dense[0].bits()
+        for term in dense[1:]:
+            bits &= term.bits()
+        return _lowest_bits(bits, exclude, limit)
+
+    candidates = sparse[0].intersection(*sparse[1:]) if len(sparse) > 1 else sparse[0]
+    if not dense:
+        return [b for b in heapq.nsmallest(limit + len(exclude), candidates) if b not in exclude][:limit]
+    # Walk candidates in id order, testing dense terms bit by bit, and stop
+    # at limit rather than sorting them all
+    heap = list(candidates)
+    heapq.heapify(heap)
+    found: List[int] = []
+    while heap and len(found) < limit:
+        bullet = heapq.heappop(heap)
+        if bullet not in exclude and all(bullet in term for term in dense):
+            found.append(bullet)
+    return found
+
+
+class _MemorySegment:
+    """Bullets inserted since the index file was last written."""
+
+    def __init__(self, start: int):
+        self.start = start
+        self.records: List[Record] = []
+        self.postings: Dict[str, array] = {}
+        self.bands: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self.documents: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: Record, terms: Iterable[str], keys: Optional[List[int]]) -> int:
+        bullet = self.start + len(self.records)
+        self.records.append(record)
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array('I')
+            postings.append(bullet)
+        if keys is not None:
+            for band, key in zip(self.bands, keys):
+                band.setdefault(key, []).append(bullet)
+        return bullet
+
+    def record(self, bullet: int) -> Record:
+        return self.records[bullet - self.start]
+
+    def term_postings(self, term: str) -> Iterable[int]:
+        return self.postings.get(term, ())
+
+    def band_ids(self, band: int, key: int) -> List[int]:
+        return self.bands[band].get(key, [])
+
+    def band_values(self, band: int) -> List[int]:
+        return [key << ID_BITS | bullet for key, ids in self.bands[band].items() for bullet in ids]
+
+
+class _MappedSegment:
+    """
+    Bullets read from an index file through mmap. Texts, postings and band
+    tables stay in the page cache and are only read when a query touches
+    them; the term dictionary and document ids are loaded at open.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if view[:4] != MAGIC:
+            raise ValueError(f"{path} is not a bullet index")
+
+        sections = []
+        offset = 4
+        while offset < len(view):
+            (size,) = _SECTION_HEADER.unpack_from(view, offset)
+            offset += _SECTION_HEADER.size
+            sections.append(view[offset:offset + size])
+            offset += size + (-size % 8)
+
+        meta = json.loads(bytes(sections[0]))
+        expected = {'version': INDEX_VERSION, 'numPerm': NUM_PERM, 'bands': BANDS, 'byteorder': sys.byteorder}
+        if any(meta.get(key) != value for key, value in expected.items()):
+            raise ValueError(f"{path} was written by another index version")
+
+        self.start = 0
+        self.count = meta['count']
+        self._record_offsets = sections[1].cast('Q')
+        self._records = sections[2]
+        terms = bytes(sections[3]).decode('utf-8').split('\n') if meta['terms'] else []
+        offsets = sections[4].cast('Q')
+        self.terms: Dict[str, Tuple[int, int]] = {
+            term: (offsets[i], offsets[i + 1]) for i, term in enumerate(terms)
+        }
+        self._postings = sections[5].cast('I')
+        self._bands = [section.cast('Q') for section in sections[6:6 + BANDS]]
+        documents = bytes(sections[6 + BANDS]).decode('utf-8')
+        self.documents: Set[str] = set(documents.split('\n')) if documents else set()
+        dense = bytes(sections[7 + BANDS]).decode('utf-8')
+        self.dense: Dict[str, int] = {term: i for i, term in enumerate(dense.split('\n'))} if dense else {}
+        self.bitmap_size = _bitmap_size(self.count)
+        self._bitmaps = sections[8 + BANDS]
+        self.size = len(view)
+        # Every view of the mapping must be released before it can be closed
+        self._views = [view, *sections, self._record_offsets, self._postings, *self._bands]
+
+    def close(self) -> None:
+        """Unmap the file. The segment must not be read afterwards."""
+        for view in self._views:
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A slice handed out earlier is still alive; the mapping is
+            # closed when it is garbage collected
+            pass
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, bullet: int) -> Record:
+        start, end = self._record_offsets[bullet], self._record_offsets[bullet + 1]
+        bullet_id, document_id, text = bytes(self._records[start:end]).decode('utf-8').split('\0', 2)
+        return bullet_id, document_id, text
+
+    def term_postings(self, term: str) -> Iterable[int]:
+        span = self.terms.get(term)
+        return self._postings[span[0]:span[1]] if span else ()
+
+    def bitmap(self, term: str) -> Optional[memoryview]:
+        """Bit i set for each bullet i containing term, for dense terms only."""
+        i = self.dense.get(term)
+        if i is None:
+            return None
+        return self._bitmaps[i * self.bitmap_size:(i + 1) * self.bitmap_size]
+
+    def band_ids(self, band: int, key: int) -> List[int]:
+        table = self._bands[band]
+        low = key << ID_BITS
+        start = bisect_left(table, low)
+        end = bisect_left(table, low + MAX_BULLETS, start)
+        return [value & ID_MASK for value in table[start:end]]
+
+    def record_bytes(self) -> Tuple[memoryview, memoryview]:
+        return self._record_offsets, self._records
+
+    def term_count(self, term: str) -> int:
+        span = self.terms.get(term)
+        return span[1] - span[0] if span else 0
+
+    def postings_bytes(self, term: str) -> bytes:
+        span = self.terms.get(term)
+        return self._postings[span[0]:span[1]].tobytes() if span else b''
+
+    def band_values(self, band: int) -> memoryview:
+        return self._bands[band]
+
+
+def _bitmap_size(count: int) -> int:
+    return (count + 63) // 64 * 8
+
+
+def _write_section(f, data) -> None:
+    data = memoryview(data).cast('B')
+    f.write(_SECTION_HEADER.pack(len(data)))
+    f.write(data)
+    f.write(b'\0' * (-len(data) % 8))
+
+
+def _write_index(path: str, base: Optional[_MappedSegment], delta: _MemorySegment) -> None:
+    """Write base plus delta to a new index file, replacing path atomically."""
+    count = (len(base) if base else 0) + len(delta)
+
+    record_offsets = array('Q')
+    records = bytearray()
+    if base is not None:
+        base_offsets, base_records = base.record_bytes()
+        record_offsets.frombytes(base_offsets.tobytes())
+        records += base_records
+    else:
+        record_offsets.append(0)
+    for record in delta.records:
+        records += '\0'.join(record).encode('utf-8')
+        record_offsets.append(len(records))
+
+    terms = list(base.terms) if base is not None else []
+    terms += [term for term in delta.postings if base is None or term not in base.terms]
+    postings = array('I')
+    posting_offsets = array('Q', [0])
+    dense: List[str] = []
+    bitmaps = bytearray()
+    bitmap_size = _bitmap_size(count)
+    for term in terms:
+        if base is not None:
+            postings.frombytes(base.postings_bytes(term))
+        new_postings = delta.postings.get(term, ())
+        postings.extend(new_postings)
+        posting_offsets.append(len(postings))
+
+        df = posting_offsets[-1] - posting_offsets[-2]
+        if count < DENSE_MIN_BULLETS or df * DENSE_RATIO < count:
+            continue
+        dense.append(term)
+        bitmap = bytearray(bitmap_size)
+        old = base.bitmap(term) if base is not None else None
+        if old is not None:
+            # Only the delta's bits are new
+            bitmap[:len(old)] = old
+        else:
+            new_postings = postings[posting_offsets[-2]:]
+        for bullet in new_postings:
+            bitmap[bullet >> 3] |= 1 << (bullet & 7)
+        bitmaps += bitmap
+
+    documents = set(delta.documents)
+    if base is not None:
+        documents |= base.documents
+
+    meta = {
+        'version': INDEX_VERSION, 'numPerm': NUM_PERM, 'bands': BANDS,
+        'byteorder': sys.byteorder, 'count': count, 'terms': len(terms),
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(MAGIC)
+            _write_section(f, json.dumps(meta).encode('utf-8'))
+            _write_section(f, record_offsets)
+            _write_section(f, records)
+            _write_section(f, '\n'.join(terms).encode('utf-8'))
+            _write_section(f, posting_offsets)
+            _write_section(f, postings)
+            for band in range(BANDS):
+                values = list(base.band_values(band)) if base is not None else []
+                values += delta.band_values(band)
+                # Base and delta values are each sorted runs, which sorted() merges in linear time
+                values.sort()
+                _write_section(f, array('Q', values))
+            _write_section(f, '\n'.join(sorted(documents)).encode('utf-8'))
+            _write_section(f, '\n'.join(dense).encode('utf-8'))
+            _write_section(f, bitmaps)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class BulletIndex:
+    """
+    Search and near-duplicate lookup over every bullet of every parsed resume.
+
+    Keyword search uses a token inverted index. A bullet's score is the
+    summed inverse document frequency of the query terms it contains, and
+    results come out best-first from intersections of term subsets that
+    stop once k bullets are found. Rare terms are intersected as cached
+    sets and common ones as bitmaps kept in the index file. Near-duplicates
+    are found with MinHash signatures bucketed by LSH band, then checked
+    with the exact Jaccard similarity of their word pairs.
+
+    New bullets go to an in-memory segment. With a path, that segment is
+    merged into the index file in the background once it holds
+    flush_every bullets (and on save()), and the file is memory-mapped,
+    so a restart reads only the term dictionary up front.
+
+    Args:
+        path: Index file (None keeps the index in memory only)
+        flush_every: Bullets inserted before the file is rewritten
+        term_cache_ids: Most bullet ids kept in cached per-term sets
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_every: int = 10000, term_cache_ids: int = 2_000_000):
+        self.path = path
+        self.flush_every = flush_every
+        self.term_cache_ids = term_cache_ids
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._base: Optional[_MappedSegment] = None
+        self._flushing: Optional[_MemorySegment] = None
+        if path and os.path.exists(path):
+            try:
+                self._base = _MappedSegment(path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening bullet index: {str(e)}")
+        self._delta = _MemorySegment(len(self._base) if self._base else 0)
+        self._term_sets: "OrderedDict[str, frozenset]" = OrderedDict()
+        self._term_cache_size = 0
+        self.searches = 0
+        self.lookups = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+
+    def _segments(self) -> List[Any]:
+        return [s for s in (self._base, self._flushing, self._delta) if s is not None]
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._segments())
+
+    def _record(self, bullet: int) -> Record:
+        for segment in reversed(self._segments()):
+            if bullet >= segment.start:
+                return segment.record(bullet)
+        raise IndexError(bullet)
+
+    def has_document(self, document_id: str) -> bool:
+        return any(document_id in s.documents for s in self._segments())
+
+    def add_document(self, document_id: str, blocks: List[Dict[str, Any]]) -> int:
+        """
+        Index the bullets of a parsed resume. A document already indexed
+        (e.g. the same PDF uploaded again) is skipped.
+
+        Returns:
+            Number of bullets added
+        """
+        if self.has_document(document_id):
+            return 0
+        prepared = []
+        for block in blocks:
+            for bullet in block.get('bullets', []):
+                text = ' '.join(bullet.get('text', '').replace('\0', ' ').split())
+                if not text or text == PLACEHOLDER_BULLET:
+                    continue
+                tokens = tokenize(text)
+                signature = minhash(shingles(tokens))
+                prepared.append((
+                    (bullet.get('id', ''), document_id, text),
+                    {token for token in tokens if token not in STOPWORDS},
+                    band_keys(signature) if signature else None,
+                ))
+
+        with self._lock:
+            if self.has_document(document_id):
+                return 0
+            if len(self) + len(prepared) > MAX_BULLETS:
+                print(f"Error indexing bullets: index is full ({MAX_BULLETS} bullets)")
+                return 0
+            for record, terms, keys in prepared:
+                self._delta.add(record, terms, keys)
+                for term in terms:
+                    cached = self._term_sets.pop(term, None)
+                    if cached is not None:
+                        self._term_cache_size -= len(cached)
+            self._delta.documents.add(document_id)
+            flush = self.path and len(self._delta) >= self.flush_every and self._flushing is None
+
+        if flush:
+            threading.Thread(target=self.save, daemon=True).start()
+        return len(prepared)
+
+    def save(self) -> None:
+        """Merge the in-memory bullets into the index file (no-op without a path)."""
+        if not self.path:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if not len(self._delta):
+                    return
+                self._flushing = self._delta
+                self._delta = _MemorySegment(self._flushing.start + len(self._flushing))
+            started = time.perf_counter()
+            try:
+                _write_index(self.path, self._base, self._flushing)
+                base = _MappedSegment(self.path)
+            except Exception as e:
+                print(f"Error saving bullet index: {str(e)}")
+                with self._lock:
+                    # Keep the bullets in memory and try again on the next save
+                    self._delta = self._merge_back(self._flushing, self._delta)
+                    self._flushing = None
+                return
+            with self._lock:
+                previous, self._base = self._base, base
+                self._flushing = None
+            # Searches read the file under the lock and keep no views of it
+            # (cached term sets hold plain ids), so nothing uses the old
+            # mapping once it has been swapped out
+            if previous is not None:
+                previous.close()
+            self.flushes += 1
+            self.last_flush_seconds = time.perf_counter() - started
+
+    @staticmethod
+    def _merge_back(older: _MemorySegment, newer: _MemorySegment) -> _MemorySegment:
+        """Append newer to older (newer's ids already follow on from older's)."""
+        older.records.extend(newer.records)
+        for term, postings in newer.postings.items():
+            older.postings.setdefault(term, array('I')).extend(postings)
+        for band, newer_band in zip(older.bands, newer.bands):
+            for key, ids in newer_band.items():
+                band.setdefault(key, []).extend(ids)
+        older.documents |= newer.documents
+        return older
+
+    def _term_set(self, term: str) -> frozenset:
+        cached = self._term_sets.get(term)
+        if cached is not None:
+            self._term_sets.move_to_end(term)
+            return cached
+        ids = frozenset(chain.from_iterable(s.term_postings(term) for s in self._segments()))
+        if len(ids) <= self.term_cache_ids:
+            self._term_sets[term] = ids
+            self._term_cache_size += len(ids)
+            while self._term_cache_size > self.term_cache_ids:
+                _, evicted = self._term_sets.popitem(last=False)
+                self._term_cache_size -= len(evicted)
+        return ids
+
+    def _term(self, term: str) -> Any:
+        """A term's bullets: a _DenseTerm if the index file has its bitmap, else a frozenset."""
+        bitmap = self._base.bitmap(term) if self._base is not None else None
+        if bitmap is None:
+            return self._term_set(term)
+        newer = frozenset(chain.from_iterable(
+            s.term_postings(term) for s in (self._flushing, self._delta) if s is not None
+        ))
+        return _DenseTerm(bitmap, len(self._base), self._base.term_count(term), newer)
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Top k bullets for a keyword query, best first.
+
+        Returns:
+            [{'bulletId', 'documentId', 'text', 'score'}, ...]
+        """
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t not in STOPWORDS]
+        with self._lock:
+            self.searches += 1
+            total = len(self)
+            weighted = []
+            for term in terms:
+                ids = self._term(term)
+                if len(ids):
+                    idf = math.log(1 + (total - len(ids) + 0.5) / (len(ids) + 0.5))
+                    weighted.append((idf, ids))
+            weighted.sort(key=lambda item: -item[0])
+            weighted = weighted[:MAX_QUERY_TERMS]
+
+            # A bullet's score is the weight of the exact set of query terms
+            # it contains, and that set outweighs all of its subsets, so
+            # visiting term subsets heaviest first finds bullets in score
+            # order: the first subset whose intersection holds a bullet is
+            # its own. Stop as soon as k bullets are found; each subset only
+            # yields the ids still needed, lowest first, so seen stays small.
+            subsets = sorted(
+                (combo for size in range(len(weighted), 0, -1)
+                 for combo in combinations(range(len(weighted)), size)),
+                key=lambda combo: -sum(weighted[i][0] for i in combo),
+            )
+            seen: Set[int] = set()
+            hits: List[Tuple[int, float]] = []
+            for combo in subsets:
+                if len(hits) >= k:
+                    break
+                matched = _intersect([weighted[i][1] for i in combo], seen, k - len(hits))
+                if not matched:
+                    continue
+                seen.update(matched)
+                score = sum(weighted[i][0] for i in combo)
+                hits.extend((bullet, score) for bullet in matched)
+
+            return [self._result(bullet, score=round(score, 4)) for bullet, score in hits]
+
+    def near_duplicates(
+        self,
+        text: str,
+        threshold: float = 0.6,
+        k: int = 10,
+        exclude_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Indexed bullets whose word pairs overlap text's by at least threshold
+        (Jaccard similarity), most similar first. exclude_id skips the bullet
+        itself when looking up an indexed bullet.
+
+        Returns:
+            [{'bulletId', 'documentId', 'text', 'similarity'}, ...]
+        """
+        query = shingles(tokenize(text))
+        signature = minhash(query)
+        if signature is None:
+            return []
+        keys = band_keys(signature)
+        with self._lock:
+            self.lookups += 1
+            candidates: Set[int] = set()
+            for band, key in enumerate(keys):
+                for segment in self._segments():
+                    candidates.update(segment.band_ids(band, key))
+                if len(candidates) >= MAX_CANDIDATES:
+                    break
+
+            matches = []
+            for bullet in candidates:
+                bullet_id, _, candidate = self._record(bullet)
+                if exclude_id is not None and bullet_id == exclude_id:
+                    continue
+                similarity = jaccard(query, shingles(tokenize(candidate)))
+                if similarity >= threshold:
+                    matches.append((similarity, bullet))
+            matches.sort(key=lambda match: (-match[0], match[1]))
+            return [self._result(bullet, similarity=round(s, 4)) for s, bullet in matches[:k]]
+
+    def _result(self, bullet: int, **extra: Any) -> Dict[str, Any]:
+        bullet_id, document_id, text = self._record(bullet)
+        return dict({'bulletId': bullet_id, 'documentId': document_id, 'text': text}, **extra)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'bullets': len(self),
+                'documents': sum(len(s.documents) for s in self._segments()),
+                'mappedBullets': len(self._base) if self._base else 0,
+                'memoryBullets': len(self._delta) + (len(self._flushing) if self._flushing else 0),
+                'fileBytes': self._base.size if self._base else 0,
+                'searches': self.searches,
+                'lookups': self.lookups,
+                'flushes': self.flushes,
+                'lastFlushSeconds': round(self.last_flush_seconds, 4),
+                'cachedTerms': len(self._term_sets),
+            }
+
+
+# BulletIndex methods a RemoteBulletIndex may call on the owning process
+REMOTE_METHODS = frozenset(('add_document', 'search', 'near_duplicates', 'stats'))
+
+
+def _answer(index: BulletIndex, conn: Connection) -> None:
+    """Answer one client's calls until it disconnects."""
+    with conn:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            if method not in REMOTE_METHODS:
+                reply = (False, ValueError(f"Unknown bullet index method '{method}'"))
+            else:
+                try:
+                    reply = (True, getattr(index, method)(*args, **kwargs))
+                except Exception as e:
+                    reply = (False, e)
+            conn.send(reply)
+
+
+def serve_bullet_index(index: BulletIndex, address: str, authkey: bytes) -> None:
+    """
+    Own the index for other processes: answer RemoteBulletIndex calls made
+    to address (a Unix socket), one thread per connection, until
+    interrupted, then save the index.
+    """
+    listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (EOFError, OSError) as e:
+                print(f"Error accepting bullet index connection: {str(e)}")
+                continue
+            threading.Thread(target=_answer, args=(index, conn), daemon=True).start()
+    finally:
+        listener.close()
+        index.save()
+
+
+class RemoteBulletIndex:
+    """
+    The BulletIndex of another process (see serve_bullet_index), for server
+    workers that share one index: every call is sent to the owner, so all
+    workers add to and search the same bullets. Each thread keeps its own
+    connection, and a broken one is reopened once per call.
+
+    Args:
+        address: Unix socket the owner listens on
+        authkey: Key the owner was started with
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            try:
+                if conn is None:
+                    conn = self._local.conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+                conn.send((method, args, kwargs))
+                ok, value = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None
+                if attempt:
+                    raise
+        if not ok:
+            raise value
+        return value
+
+    def add_document(self, document_id: str, blocks: List[Dict[str, Any]]) -> int:
+        return self._call('add_document', document_id, blocks)
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        return self._call('search', query, k)
+
+    def near_duplicates(
+        self,
+        text: str,
+        threshold: float = 0.6,
+        k: int = 10,
+        exclude_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._call('near_duplicates', text, threshold, k, exclude_id=exclude_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call('stats')
+
+    def save(self) -> None:
+        """No-op: the owner saves the index when it stops."""
+
+
+def create_bullet_index() -> BulletIndex:
+    """Build the bullet index from BULLET_INDEX_* environment variables."""
+    return BulletIndex(
+        path=os.environ.get('BULLET_INDEX_PATH') or None,
+        flush_every=int(os.environ.get('BULLET_INDEX_FLUSH_EVERY', 10000)),
+        term_cache_ids=int(os.environ.get('BULLET_INDEX_TERM_CACHE_IDS', 2_000_000)),
+    )
@@ -0,0 +1,395 @@
+import asyncio
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from starlette.concurrency import run_in_threadpool
+
+from parse import PARSER_VERSION
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache bounded by entry count, total size and age.
+
+    Args:
+        max_entries: Maximum number of entries kept
+        max_bytes: Maximum total size of all entries (as reported by sizeof)
+        max_age: Seconds after which an entry is treated as expired (None = never)
+        sizeof: Callable returning the size of a value in bytes
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: Optional[float] = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, stored_at = entry
+            if self.max_age is not None and time.time() - stored_at > self.max_age:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.time())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+
+class DiskCache:
+    """
+    JSON-file cache stored in a directory so entries survive restarts.
+
+    Entries older than max_age are dropped, and the oldest files are removed
+    once the directory grows past max_bytes. The size of every entry is
+    tracked in memory so a put only evicts when the total goes over the
+    limit; the directory itself is rescanned every rescan_every puts to drop
+    expired files and pick up entries written by other processes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age: Optional[float] = None,
+        rescan_every: int = 64,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.rescan_every = rescan_every
+        self._lock = threading.Lock()
+        # Entry path -> size in bytes, oldest write first
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._puts = 0
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace(':', '_') + '.json')
+
+    def _forget(self, path: str) -> None:
+        self._bytes -= self._sizes.pop(path, 0)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+                os.unlink(path)
+                with self._lock:
+                    self._forget(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        temp_path = f"{path}.{uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+                size = f.tell()
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry: {str(e)}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return
+
+        with self._lock:
+            self._forget(path)
+            self._sizes[path] = size
+            self._bytes += size
+            self._puts += 1
+            rescan = self._puts % self.rescan_every == 0
+            if not rescan:
+                self._evict()
+        if rescan:
+            self.prune()
+
+    def _evict(self) -> None:
+        """Remove the oldest tracked entries until under max_bytes. Caller holds the lock."""
+        while self._bytes > self.max_bytes and self._sizes:
+            path = next(iter(self._sizes))
+            self._forget(path)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def prune(self) -> None:
+        """Rescan the directory: drop expired entries, then the oldest ones until under max_bytes."""
+        with self._lock:
+            now = time.time()
+            files = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            self._sizes = {path: size for _, size, path in sorted(files)}
+            self._bytes = sum(self._sizes.values())
+            self._evict()
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value))
+
+
+def refresh_ids(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a deep copy of a parse result with new block and bullet ids."""
+    result = copy.deepcopy(result)
+    for block in result.get('blocks', []):
+        block['id'] = str(uuid4())
+        for bullet in block.get('bullets', []):
+            bullet['id'] = str(uuid4())
+    return result
+
+
+class ParseCache:
+    """
+    Content-addressed cache for parse results.
+
+    Keys are a hash of the uploaded bytes plus the parser version, so a new
+    parser release never serves results from an older one. Lookups go to the
+    in-memory LRU first, then to the optional on-disk tier. Concurrent
+    requests for the same key share a single parse.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def digest_key(digest: str, *variant: Any) -> str:
+        """Build the cache key for content with the given SHA-256 hex digest."""
+        return ':'.join([digest, f"v{PARSER_VERSION}"] + [str(v) for v in variant])
+
+    def _from_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.memory.get(key)
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def _from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.disk.get(key) if self.disk is not None else None
+        if result is not None:
+            self.hits += 1
+            self.disk_hits += 1
+            self.memory.put(key, result)
+        return result
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Store a copy of result in memory and return it, or None for errors."""
+        if 'error' in result:
+            return None
+        result = copy.deepcopy(result)
+        self.memory.put(key, result)
+        return result
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result with fresh ids, or None. Reads the disk tier, so call it off the event loop."""
+        result = self._from_memory(key)
+        if result is None:
+            result = self._from_disk(key)
+        return refresh_ids(result) if result is not None else None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result. Writes the disk tier, so call it off the event loop."""
+        stored = self._remember(key, result)
+        if stored is not None and self.disk is not None:
+            self.disk.put(key, stored)
+
+    async def get_or_parse(
+        self,
+        key: str,
+        parse: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Return the cached result for key, running parse() on a miss.
+
+        If a lookup or parse for the same key is already running, wait for it
+        instead of starting another one. The disk tier is read and written in
+        a worker thread.
+        """
+        cached = self._from_memory(key)
+        if cached is not None:
+            return refresh_ids(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            result = await asyncio.shield(inflight)
+            return refresh_ids(result)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if self.disk is not None:
+                cached = await run_in_threadpool(self._from_disk, key)
+                if cached is not None:
+                    future.set_result(cached)
+                    return refresh_ids(cached)
+
+            self.misses += 1
+            result = await parse()
+            stored = self._remember(key, result)
+            future.set_result(result)
+            if stored is not None and self.disk is not None:
+                await run_in_threadpool(self.disk.put, key, stored)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            if future.done():
+                raise
+            future.set_exception(e)
+            # Retrieve the exception so it is not reported as unhandled
+            # when nobody else was waiting on this key.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'diskHits': self.disk_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self.memory),
+            'bytes': self.memory.total_bytes,
+            'evictions': self.memory.evictions,
+            'diskEnabled': self.disk is not None,
+        }
+
+
+class ExportCache:
+    """
+    Rendered PDFs keyed by export.resume_digest, so exporting an unchanged
+    resume again skips rendering.
+    """
+
+    def __init__(self, memory: LRUCache):
+        self.memory = memory
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        pdf = self.memory.get(key)
+        if pdf is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return pdf
+
+    def put(self, key: str, pdf: bytes) -> None:
+        self.memory.put(key, pdf)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self.memory),
+            'bytes': self.memory.total_bytes,
+            'evictions': self.memory.evictions,
+        }
+
+
+def create_parse_cache() -> ParseCache:
+    """Build the parse cache from PARSE_CACHE_* environment variables."""
+    max_age = float(os.environ.get('PARSE_CACHE_TTL', 24 * 60 * 60))
+    memory = LRUCache(
+        max_entries=int(os.environ.get('PARSE_CACHE_ENTRIES', 256)),
+        max_bytes=int(os.environ.get('PARSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        max_age=max_age,
+        sizeof=_json_size,
+    )
+
+    disk = None
+    cache_dir = os.environ.get('PARSE_CACHE_DIR')
+    if cache_dir:
+        disk = DiskCache(
+            cache_dir,
+            max_bytes=int(os.environ.get('PARSE_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024)),
+            max_age=max_age,
+        )
+
+    return ParseCache(memory, disk)
+
+
+def create_export_cache() -> ExportCache:
+    """Build the rendered-PDF cache from EXPORT_CACHE_* environment variables."""
+    return ExportCache(LRUCache(
+        max_entries=int(os.environ.get('EXPORT_CACHE_ENTRIES', 128)),
+        max_bytes=int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+        max_age=float(os.environ.get('EXPORT_CACHE_TTL', 60 * 60)),
+    ))
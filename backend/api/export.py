@@ -1,138 +1,209 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Bullet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Flowable, SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from io import BytesIO
+import hashlib
+import json
+import os
 import tempfile
-from typing import Dict, Any
+import time
+from typing import Any, Callable, Dict, List
 
+from metrics import stage
 
-def generate_resume_pdf(data: Dict[str, Any]) -> str:
-    """
-    Generate a professional PDF resume from job blocks.
-    
-    Args:
-        data: Dictionary containing 'blocks' with job information
-        
-    Returns:
-        Path to generated PDF file
-    """
-    # Create temporary file for PDF
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-    pdf_path = temp_file.name
-    temp_file.close()
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        pdf_path,
-        pagesize=letter,
-        rightMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        topMargin=0.75*inch,
-        bottomMargin=0.75*inch
-    )
-    
-    # Container for PDF elements
-    elements = []
-    
-    # Styles
+
+# Bump whenever the PDF layout changes so cached exports are not reused.
+EXPORT_VERSION = "1"
+
+# Temporary files written by generate_resume_pdf start with this prefix
+TEMP_PREFIX = 'resublocks_export_'
+
+PAGE_SETTINGS = dict(
+    pagesize=letter,
+    rightMargin=0.75*inch,
+    leftMargin=0.75*inch,
+    topMargin=0.75*inch,
+    bottomMargin=0.75*inch
+)
+
+
+def _build_styles() -> Dict[str, ParagraphStyle]:
+    """Create the paragraph styles used by every export."""
     styles = getSampleStyleSheet()
     
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor='#2D2D2D',
-        spaceAfter=6,
-        alignment=TA_CENTER,
-    )
-    
-    company_style = ParagraphStyle(
-        'CompanyStyle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor='#2D2D2D',
-        spaceAfter=3,
-        bold=True,
-    )
-    
-    job_title_style = ParagraphStyle(
-        'JobTitleStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor='#4A7C2C',  # Primary green
-        italic=True,
-        spaceAfter=3,
-    )
-    
-    meta_style = ParagraphStyle(
-        'MetaStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor='#6B5D47',  # Muted foreground
-        spaceAfter=6,
-    )
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor='#2D2D2D',
+            spaceAfter=6,
+            alignment=TA_CENTER,
+        ),
+        'company': ParagraphStyle(
+            'CompanyStyle',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor='#2D2D2D',
+            spaceAfter=3,
+            bold=True,
+        ),
+        'job_title': ParagraphStyle(
+            'JobTitleStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor='#4A7C2C',  # Primary green
+            italic=True,
+            spaceAfter=3,
+        ),
+        'meta': ParagraphStyle(
+            'MetaStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor='#6B5D47',  # Muted foreground
+            spaceAfter=6,
+        ),
+        'bullet': ParagraphStyle(
+            'BulletStyle',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor='#2D2D2D',
+            leftIndent=20,
+            spaceAfter=4,
+            leading=14,
+        ),
+    }
+
+
+# Styles never change between exports, so they are built once at import
+STYLES = _build_styles()
+
+# Load the metrics of every font the styles use now rather than on the first export
+for _font in {style.fontName for style in STYLES.values()}:
+    pdfmetrics.getFont(_font)
+
+
+def resume_digest(data: Dict[str, Any]) -> str:
+    """
+    Canonical hash of everything that affects the exported PDF.
     
-    bullet_style = ParagraphStyle(
-        'BulletStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor='#2D2D2D',
-        leftIndent=20,
-        spaceAfter=4,
-        leading=14,
-    )
+    Block and bullet ids are left out, so the same content always maps to
+    the same digest.
+    """
+    content = [
+        [block['company'], block['title'], block['location'], block['dateRange'],
+         [bullet['text'] for bullet in block['bullets']]]
+        for block in data.get('blocks', [])
+    ]
+    canonical = json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+    return f"{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}:v{EXPORT_VERSION}"
+
+
+def block_header(block: Dict[str, Any], paragraph: Callable[..., Flowable] = Paragraph) -> List[Flowable]:
+    """Company, job title and location/date lines of one job block."""
+    # Location and date share a line
+    meta_text = f"{block['location']} | {block['dateRange']}"
+    return [
+        paragraph(block['company'], STYLES['company']),
+        paragraph(block['title'], STYLES['job_title']),
+        paragraph(meta_text, STYLES['meta']),
+    ]
+
+
+def bullet_line(bullet: Dict[str, Any], paragraph: Callable[..., Flowable] = Paragraph) -> Flowable:
+    return paragraph(f"• {bullet['text']}", STYLES['bullet'])
+
+
+def build_elements(
+    data: Dict[str, Any],
+    header: Callable[[Dict[str, Any]], List[Flowable]] = block_header,
+    bullet: Callable[[Dict[str, Any]], Flowable] = bullet_line,
+) -> List[Flowable]:
+    """
+    Lay out the resume as a list of flowables.
     
-    # Add header
-    elements.append(Paragraph("PROFESSIONAL EXPERIENCE", title_style))
-    elements.append(Spacer(1, 0.3*inch))
+    header and bullet create the flowables for one block header and one
+    bullet; layout.py passes cached versions of them.
+    """
+    elements: List[Flowable] = [
+        Paragraph("PROFESSIONAL EXPERIENCE", STYLES['title']),
+        Spacer(1, 0.3*inch),
+    ]
     
-    # Add job blocks
     blocks = data.get('blocks', [])
     for i, block in enumerate(blocks):
-        # Company name
-        elements.append(Paragraph(block['company'], company_style))
-        
-        # Job title
-        elements.append(Paragraph(block['title'], job_title_style))
-        
-        # Location and date
-        meta_text = f"{block['location']} | {block['dateRange']}"
-        elements.append(Paragraph(meta_text, meta_style))
-        
-        # Bullets
-        for bullet in block['bullets']:
-            bullet_text = f"• {bullet['text']}"
-            elements.append(Paragraph(bullet_text, bullet_style))
+        elements.extend(header(block))
+        for item in block['bullets']:
+            elements.append(bullet(item))
         
         # Add space between jobs (except after last one)
         if i < len(blocks) - 1:
             elements.append(Spacer(1, 0.2*inch))
     
-    # Build PDF
-    doc.build(elements)
+    return elements
+
+
+def build_pdf(elements: List[Flowable]) -> bytes:
+    """Paginate and draw flowables into an in-memory PDF."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, **PAGE_SETTINGS)
+    with stage('build'):
+        doc.build(elements)
+    return buffer.getvalue()
+
+
+def render_resume_pdf(data: Dict[str, Any]) -> bytes:
+    """
+    Render a professional PDF resume from job blocks, entirely in memory.
     
-    return pdf_path
-
-
-# Example usage
-if __name__ == "__main__":
-    sample_data = {
-        'blocks': [
-            {
-                'company': 'Tech Company',
-                'title': 'Software Engineer',
-                'location': 'San Francisco, CA',
-                'dateRange': 'Jan 2024 - Present',
-                'bullets': [
-                    {'text': 'Developed full-stack applications'},
-                    {'text': 'Led team of 5 engineers'},
-                ]
-            }
-        ]
-    }
+    Args:
+        data: Dictionary containing 'blocks' with job information
+        
+    Returns:
+        The PDF file content
+    """
+    return build_pdf(build_elements(data))
+
+
+def generate_resume_pdf(data: Dict[str, Any]) -> str:
+    """
+    Generate a PDF resume and write it to a temporary file.
     
-    pdf_path = generate_resume_pdf(sample_data)
-    print(f"PDF generated at: {pdf_path}")
+    The caller owns the file and must delete it; remove_stale_exports
+    deletes any that are left behind.
+    
+    Returns:
+        Path to generated PDF file
+    """
+    with tempfile.NamedTemporaryFile(delete=False, prefix=TEMP_PREFIX, suffix='.pdf') as temp_file:
+        temp_file.write(render_resume_pdf(data))
+    return temp_file.name
 
+
+def remove_stale_exports(max_age: float = 3600) -> int:
+    """
+    Delete temporary export files older than max_age seconds.
+    
+    Only files named with TEMP_PREFIX are touched; see the README for the
+    files older versions left under generic tmp*.pdf names.
+    
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    directory = tempfile.gettempdir()
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        if not (name.startswith(TEMP_PREFIX) and name.endswith('.pdf')):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,247 @@
+import re
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+from typing import BinaryIO, Dict, Iterator, Union
+
+import pdfplumber
+import pypdfium2 as pdfium
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTChar, LTContainer, LTText, LTTextBox
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from metrics import stage
+
+
+# A PDF given as a file path, its bytes, or a seekable binary file object
+PdfSource = Union[str, bytes, BinaryIO]
+
+
+@contextmanager
+def open_source(source: PdfSource) -> Iterator[BinaryIO]:
+    """Open a PdfSource as a binary file positioned at the start."""
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+    elif isinstance(source, str):
+        with open(source, 'rb') as pdf_file:
+            yield pdf_file
+    else:
+        source.seek(0)
+        yield source
+
+
+# pdfminer writes glyphs it cannot map to unicode as "(cid:N)". Resume
+# bullets are usually drawn with such a glyph (a symbol missing from the
+# font's encoding), so one at the start of a line is read as the "•" that
+# PDFium reports for it
+UNMAPPED_BULLET = re.compile(r'^([ \t]*)\(cid:\d+\)', re.MULTILINE)
+
+# pdfminer reads ZapfDingbats glyphs by their code in the standard
+# encoding ('l' for a filled circle). These are the shapes PDFium reports
+# for the common bullet glyphs; any other dingbat is read as "•"
+DINGBATS = {'l': '●', 'n': '■'}
+
+
+def glyph_text(fontname: str, text: str) -> str:
+    """Text of one character as pdfminer read it, with dingbats as bullet characters."""
+    if 'dingbats' in fontname.lower():
+        return DINGBATS.get(text, '•')
+    return text
+
+
+def normalize_bullets(text: str) -> str:
+    """Replace unmapped bullet glyphs at the start of lines with '•'."""
+    return UNMAPPED_BULLET.sub('\\1•', text)
+
+
+def _pdfium_input(source: PdfSource):
+    if not isinstance(source, (str, bytes, bytearray)):
+        source.seek(0)
+    return source
+
+
+class TextExtractor(ABC):
+    """
+    Interface for turning a PDF into plain text, one string per page.
+
+    Every backend must return lines in reading order separated by '\n',
+    with bullet markers as characters rather than glyph codes (see
+    glyph_text and normalize_bullets), so extract_jobs_from_text produces the same blocks
+    whichever one is used.
+    Sources may be a path, bytes or a file object (see PdfSource), and
+    backends release each page's parsed objects once its text is extracted.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def page_count(self, source: PdfSource) -> int:
+        """Number of pages in the PDF."""
+
+    @abstractmethod
+    def iter_page_texts(self, source: PdfSource) -> Iterator[str]:
+        """Yield the text of each page in order, opening the PDF once."""
+
+    @abstractmethod
+    def extract_page(self, source: PdfSource, page_number: int) -> str:
+        """Extract a single page (0-based); used by parallel page workers."""
+
+
+class PdfplumberExtractor(TextExtractor):
+    """pdfplumber's layout-aware extraction; slowest but the reference output."""
+
+    name = "pdfplumber"
+
+    def page_count(self, source: PdfSource) -> int:
+        with open_source(source) as pdf_file, pdfplumber.open(pdf_file) as pdf:
+            return len(pdf.pages)
+
+    @staticmethod
+    def _page_text(page) -> str:
+        try:
+            with stage('extract'):
+                for char in page.chars:
+                    char['text'] = glyph_text(char['fontname'], char['text'])
+                return normalize_bullets(page.extract_text() or "")
+        finally:
+            # Drop the page's cached chars and layout objects; pdf.pages
+            # keeps every page alive until the document is closed
+            page.close()
+
+    def iter_page_texts(self, source: PdfSource) -> Iterator[str]:
+        with open_source(source) as pdf_file:
+            with stage('open'):
+                pdf = pdfplumber.open(pdf_file)
+            with pdf:
+                for page in pdf.pages:
+                    yield self._page_text(page)
+
+    def extract_page(self, source: PdfSource, page_number: int) -> str:
+        with open_source(source) as pdf_file:
+            with stage('open'):
+                pdf = pdfplumber.open(pdf_file, pages=[page_number + 1])
+            with pdf:
+                return self._page_text(pdf.pages[0])
+
+
+class PdfiumExtractor(TextExtractor):
+    """PDFium's native text extraction via pypdfium2; much faster than pdfminer."""
+
+    name = "pdfium"
+
+    @staticmethod
+    def _page_text(pdf, page_number: int) -> str:
+        with stage('extract'):
+            page = pdf[page_number]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_bounded()
+            finally:
+                textpage.close()
+                page.close()
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    def page_count(self, source: PdfSource) -> int:
+        pdf = pdfium.PdfDocument(_pdfium_input(source))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_page_texts(self, source: PdfSource) -> Iterator[str]:
+        with stage('open'):
+            pdf = pdfium.PdfDocument(_pdfium_input(source))
+        try:
+            for page_number in range(len(pdf)):
+                yield self._page_text(pdf, page_number)
+        finally:
+            pdf.close()
+
+    def extract_page(self, source: PdfSource, page_number: int) -> str:
+        with stage('open'):
+            pdf = pdfium.PdfDocument(_pdfium_input(source))
+        try:
+            return self._page_text(pdf, page_number)
+        finally:
+            pdf.close()
+
+
+class PdfminerExtractor(TextExtractor):
+    """
+    Raw pdfminer without pdfplumber's per-character objects, using layout
+    parameters tuned for single-column resumes.
+    """
+
+    name = "pdfminer"
+
+    def _laparams(self):
+        # Resumes are horizontal, single-column text: skip vertical text
+        # detection and figure text to cut layout analysis time
+        return LAParams(line_margin=0.5, char_margin=2.0, detect_vertical=False, all_texts=False)
+
+    @staticmethod
+    def _write_text(item, output: StringIO) -> None:
+        # The text pdfminer's TextConverter writes for a page, with each
+        # character passed through glyph_text
+        if isinstance(item, LTChar):
+            output.write(glyph_text(item.fontname, item.get_text()))
+        elif isinstance(item, LTContainer):
+            for child in item:
+                PdfminerExtractor._write_text(child, output)
+        elif isinstance(item, LTText):
+            output.write(item.get_text())
+        if isinstance(item, LTTextBox):
+            output.write('\n')
+
+    def _iter_pages(self, pdf_file, page_numbers=None) -> Iterator[str]:
+        resources = PDFResourceManager(caching=True)
+        laparams = self._laparams()
+        for page in PDFPage.get_pages(pdf_file, pagenos=page_numbers):
+            output = StringIO()
+            device = PDFPageAggregator(resources, laparams=laparams)
+            try:
+                with stage('extract'):
+                    PDFPageInterpreter(resources, device).process_page(page)
+                    self._write_text(device.get_result(), output)
+            finally:
+                device.close()
+            output.write('\f')
+            yield normalize_bullets(output.getvalue())
+
+    def page_count(self, source: PdfSource) -> int:
+        with open_source(source) as pdf_file:
+            return sum(1 for _ in PDFPage.get_pages(pdf_file))
+
+    def iter_page_texts(self, source: PdfSource) -> Iterator[str]:
+        with open_source(source) as pdf_file:
+            yield from self._iter_pages(pdf_file)
+
+    def extract_page(self, source: PdfSource, page_number: int) -> str:
+        with open_source(source) as pdf_file:
+            for text in self._iter_pages(pdf_file, {page_number}):
+                return text
+        return ""
+
+
+EXTRACTORS: Dict[str, TextExtractor] = {
+    extractor.name: extractor
+    for extractor in (PdfiumExtractor(), PdfplumberExtractor(), PdfminerExtractor())
+}
+
+# Backend tried next when a backend's output fails the quality check.
+# pdfplumber is the reference extractor, so it is always the last resort.
+FALLBACKS: Dict[str, str] = {
+    'pdfium': 'pdfplumber',
+    'pdfminer': 'pdfplumber',
+}
+
+
+def get_extractor(name: str) -> TextExtractor:
+    """Return the extractor registered under name, or raise ValueError."""
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown extraction backend '{name}' (expected one of: {', '.join(EXTRACTORS)})"
+        )
@@ -0,0 +1,405 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
+from multiprocessing.connection import Connection
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Sequence, Union
+from uuid import uuid4
+
+from metrics import collect_stages, record_stages
+
+
+class QueueFullError(Exception):
+    """Raised when the parse queue cannot accept more work."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Parse queue is full, please retry later")
+        self.retry_after = retry_after
+
+
+# Set inside a submitted job's task while it holds the slot submit() reserved
+# for it, so the job's parse uses that slot instead of taking another
+_job_slot: ContextVar[bool] = ContextVar('job_slot', default=False)
+
+
+def _init_worker() -> None:
+    """Preload the PDF stack so the first job in each worker is not slower."""
+    import pdfplumber  # noqa: F401
+    import pypdfium2  # noqa: F401
+    import parse  # noqa: F401
+
+
+def _parse_in_worker(source: Union[bytes, str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse PDF bytes (or a spooled upload's path) inside a worker process and report timings."""
+    from parse import parse_resume
+
+    started_at = time.time()
+    extraction: Dict[str, Any] = {}
+    # Stage timings cannot reach the server's metrics from this process,
+    # so they are sent back with the result
+    with collect_stages() as timer:
+        result = parse_resume(source, stats=extraction, **options)
+
+    return {
+        'result': result,
+        'extraction': extraction,
+        'stages': timer.stages,
+        'startedAt': started_at,
+        'finishedAt': time.time(),
+    }
+
+
+def _stream_in_worker(source: Union[bytes, str], options: Dict[str, Any], events: Connection) -> Dict[str, Any]:
+    """
+    Run the incremental parser inside a worker process, sending each event
+    over events as soon as it is produced, and report timings.
+    """
+    from parse import iter_parse_events
+
+    started_at = time.time()
+    try:
+        with collect_stages() as timer:
+            for event in iter_parse_events(source, **options):
+                events.send(event)
+    finally:
+        events.close()
+
+    return {
+        'stages': timer.stages,
+        'startedAt': started_at,
+        'finishedAt': time.time(),
+    }
+
+
+def _receive_event(events: Connection, future: Future) -> Optional[Dict[str, Any]]:
+    """Wait for the next event of a streaming parse, or None once it has finished."""
+    while True:
+        if events.poll(0.1):
+            return events.recv()
+        if future.done():
+            # Events sent just before the worker finished
+            return events.recv() if events.poll(0) else None
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(samples: Deque[float]) -> Dict[str, float]:
+    return {
+        'avg': round(sum(samples) / len(samples), 4) if samples else 0.0,
+        'p50': round(percentile(samples, 50), 4),
+        'p95': round(percentile(samples, 95), 4),
+        'max': round(max(samples), 4) if samples else 0.0,
+    }
+
+
+class ParseJobEngine:
+    """
+    Runs PDF parsing in a bounded pool of worker processes.
+
+    At most `workers` parses run at once and at most `max_queue` more wait
+    for a worker; anything beyond that is rejected with QueueFullError so
+    the service never builds an unbounded backlog.
+
+    Args:
+        workers: Number of worker processes
+        max_queue: Number of parses allowed to wait for a free worker
+        job_ttl: Seconds a finished async job's result is kept
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, job_ttl: float = 600):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._running = 0
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_times: Deque[float] = deque(maxlen=1000)
+        self.run_times: Deque[float] = deque(maxlen=1000)
+        self.backend_times: Dict[str, Deque[float]] = {}
+        self.fallbacks = 0
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def warm_up(self, source: bytes) -> None:
+        """Start the worker processes and parse source once per worker, outside the job stats."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _parse_in_worker, source, {}) for _ in range(self.workers)
+        ))
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self._running)
+
+    def retry_after(self) -> int:
+        """Estimate of seconds until a queue slot frees up."""
+        avg_run = sum(self.run_times) / len(self.run_times) if self.run_times else 1.0
+        return max(1, math.ceil(avg_run * (self.queue_depth + 1) / self.workers))
+
+    def check_capacity(self) -> None:
+        """Raise QueueFullError if no more work can be admitted."""
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+    def _reserve(self) -> None:
+        """Take a slot for one parse, or raise QueueFullError."""
+        self.check_capacity()
+        self.start()
+        self._pending += 1
+        self._running = min(self._pending, self.workers)
+
+    def _release(self) -> None:
+        self._pending -= 1
+        self._running = min(self._pending, self.workers)
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Send a reserved parse to the pool. Its slot is released when the
+        worker is done with it, not when the caller stops waiting: a parse
+        a worker has picked up keeps running after its request is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        def release(_: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                # The event loop has already been closed
+                pass
+
+        future.add_done_callback(release)
+        return future
+
+    def _record(self, outcome: Dict[str, Any], submitted_at: float) -> None:
+        """Record a finished parse's queue wait, run time and stage timings."""
+        wait_time = max(0.0, outcome['startedAt'] - submitted_at)
+        run_time = outcome['finishedAt'] - outcome['startedAt']
+        self.wait_times.append(wait_time)
+        self.run_times.append(run_time)
+        self._record_extraction(outcome['extraction'])
+        record_stages(dict(outcome['stages'], queue=wait_time, parse=run_time))
+        self.completed += 1
+
+    def _failed(self, e: BaseException) -> None:
+        if isinstance(e, BrokenProcessPool):
+            # A worker died (e.g. out of memory); start a fresh pool so
+            # later requests are not stuck behind the broken one.
+            self.shutdown()
+        self.failed += 1
+
+    async def run(self, source: Union[bytes, str], **options: Any) -> Dict[str, Any]:
+        """
+        Parse PDF bytes, or the PDF at a file path, in the worker pool and
+        return the parse result.
+
+        Keyword options are passed through to parse.parse_resume.
+        Inside a job started by submit(), the slot reserved for the job is
+        used instead of taking a new one.
+        """
+        if _job_slot.get():
+            _job_slot.set(False)
+        else:
+            self._reserve()
+        submitted_at = time.time()
+        future = self._submit(_parse_in_worker, source, options)
+        try:
+            outcome = await asyncio.wrap_future(future)
+        except Exception as e:
+            self._failed(e)
+            raise
+
+        self._record(outcome, submitted_at)
+        return outcome['result']
+
+    def stream(self, source: Union[bytes, str], **options: Any) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run parse.iter_parse_events on PDF bytes, or the PDF at a file path,
+        in the worker pool, and return an async iterator over its events as
+        the worker produces them.
+
+        The parse takes its slot and starts right away, so QueueFullError is
+        raised here rather than while iterating. Events are buffered until
+        read, so a client that stops reading never blocks the worker.
+
+        Keyword options are passed through to parse.iter_parse_events.
+        """
+        self._reserve()
+        submitted_at = time.time()
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        try:
+            future = self._submit(_stream_in_worker, source, options, writer)
+        except BaseException:
+            reader.close()
+            writer.close()
+            raise
+
+        events: asyncio.Queue = asyncio.Queue()
+        asyncio.get_running_loop().create_task(
+            self._relay(reader, writer, future, events, submitted_at)
+        )
+        return self._events(events)
+
+    async def _relay(
+        self,
+        reader: Connection,
+        writer: Connection,
+        future: Future,
+        events: asyncio.Queue,
+        submitted_at: float,
+    ) -> None:
+        """Move a streaming parse's events from its pipe to events, then record the outcome."""
+        loop = asyncio.get_running_loop()
+        attempts = []
+        try:
+            while True:
+                event = await loop.run_in_executor(None, _receive_event, reader, future)
+                if event is None:
+                    break
+                if event['type'] == 'summary':
+                    attempts = event.get('attempts', [])
+                events.put_nowait(event)
+            outcome = await asyncio.wrap_future(future)
+        except Exception as e:
+            self._failed(e)
+            events.put_nowait(e)
+        else:
+            self._record(dict(outcome, extraction={'attempts': attempts}), submitted_at)
+        finally:
+            # The worker's copy of writer was made when the job was sent
+            reader.close()
+            writer.close()
+            events.put_nowait(None)
+
+    @staticmethod
+    async def _events(events: asyncio.Queue) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await events.get()
+            if event is None:
+                return
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    def _record_extraction(self, extraction: Dict[str, Any]) -> None:
+        attempts = extraction.get('attempts', [])
+        if len(attempts) > 1:
+            self.fallbacks += 1
+        for attempt in attempts:
+            samples = self.backend_times.setdefault(attempt['backend'], deque(maxlen=1000))
+            samples.append(attempt['seconds'])
+
+    def submit(self, job: Callable[[], Awaitable[Dict[str, Any]]]) -> str:
+        """
+        Start an async parse job and return its id.
+
+        The job's queue slot is reserved here, so a job that was accepted
+        never fails later with QueueFullError. The first run() the job makes
+        uses that slot; it is released once the job finishes.
+
+        Args:
+            job: Coroutine factory producing the parse result
+
+        Returns:
+            Job id for get_job()
+
+        Raises:
+            QueueFullError: If the queue has no free slot
+        """
+        self._reserve()
+        self._prune_jobs()
+
+        job_id = str(uuid4())
+        self._jobs[job_id] = {'id': job_id, 'status': 'pending', 'createdAt': time.time()}
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run_job(job_id, job))
+        self.submitted += 1
+        return job_id
+
+    async def _run_job(self, job_id: str, job: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        record = self._jobs[job_id]
+        _job_slot.set(True)
+        try:
+            result = await job()
+            if 'error' in result:
+                record.update(status='failed', error=result['error'])
+            else:
+                record.update(status='succeeded', result=result)
+        except Exception as e:
+            print(f"Error in parse job {job_id}: {str(e)}")
+            record.update(status='failed', error=str(e))
+        finally:
+            if _job_slot.get():
+                # The job never reached run(), e.g. it was served from the cache
+                self._release()
+            record['finishedAt'] = time.time()
+            self._tasks.pop(job_id, None)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def _prune_jobs(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, record in self._jobs.items()
+            if 'finishedAt' in record and now - record['finishedAt'] > self.job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'maxQueue': self.max_queue,
+            'queueDepth': self.queue_depth,
+            'running': self._running,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'waitTime': _summary(self.wait_times),
+            'runTime': _summary(self.run_times),
+            'fallbacks': self.fallbacks,
+            'backends': {
+                name: dict(_summary(samples), count=len(samples))
+                for name, samples in self.backend_times.items()
+            },
+        }
+
+
+def create_parse_engine() -> ParseJobEngine:
+    """Build the parse engine from PARSE_* environment variables."""
+    return ParseJobEngine(
+        workers=int(os.environ.get('PARSE_WORKERS', min(4, os.cpu_count() or 1))),
+        max_queue=int(os.environ.get('PARSE_QUEUE_SIZE', 32)),
+        job_ttl=float(os.environ.get('PARSE_JOB_TTL', 600)),
+    )
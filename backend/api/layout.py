@@ -0,0 +1,237 @@
+import copy
+import hashlib
+import os
+import threading
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate
+
+from cache import LRUCache
+from export import PAGE_SETTINGS, block_header, build_elements, build_pdf, bullet_line
+from metrics import stage
+
+
+class PrewrappedParagraph(Paragraph):
+    """
+    Paragraph that keeps its line breaks between exports, so an unchanged
+    paragraph is not re-wrapped. Drawing is left to Paragraph, since the
+    fonts a paragraph uses are named per document.
+
+    The layout tag (block id, bullet id and field) identifies the
+    paragraph in layout-only responses.
+    """
+
+    layout_tag: Optional[Dict[str, Any]] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Wrap results by available width, shared by the copies each build uses
+        self._wrapped: Dict[float, Tuple[Any, Any, Tuple[float, float]]] = {}
+
+    def wrap(self, availWidth, availHeight):
+        cached = self._wrapped.get(availWidth)
+        if cached is not None:
+            self.blPara, self._wrapWidths, size = cached
+            self.width, self.height = size
+            return size
+        size = super().wrap(availWidth, availHeight)
+        self._wrapped[availWidth] = (self.blPara, self._wrapWidths, size)
+        return size
+
+    def split(self, availWidth, availHeight):
+        parts = super().split(availWidth, availHeight)
+        for part in parts:
+            part.layout_tag = self.layout_tag
+        return parts
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        if getattr(canvas, 'layout_only', False):
+            # Frames place the next flowable below this one's space after
+            canvas.placed_y = y - self.getSpaceAfter()
+            return
+        super().drawOn(canvas, x, y, _sW)
+
+
+class _LayoutCanvas(Canvas):
+    """
+    Canvas for layout-only builds. Nothing is drawn (PrewrappedParagraph
+    checks layout_only and records where it would have been drawn in
+    placed_y), so graphics state changes, page output and the final PDF
+    are skipped too.
+    """
+
+    layout_only = True
+    placed_y = 0.0
+
+    def saveState(self):
+        pass
+
+    def restoreState(self):
+        pass
+
+    def transform(self, a, b, c, d, e, f):
+        pass
+
+    def showPage(self):
+        pass
+
+    def save(self):
+        pass
+
+
+class _LayoutDoc(SimpleDocTemplate):
+    """Paginates like a normal export but records where each paragraph lands."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placements: List[Dict[str, Any]] = []
+
+    def afterFlowable(self, flowable):
+        tag = getattr(flowable, 'layout_tag', None)
+        if tag is None:
+            return
+        self.placements.append(dict(
+            tag,
+            page=self.page,
+            y=round(self.canv.placed_y, 1),
+            lines=_line_texts(flowable),
+        ))
+
+
+def _line_texts(paragraph: Paragraph) -> List[str]:
+    """Text of each wrapped line of a paragraph."""
+    bl_para = getattr(paragraph, 'blPara', None)
+    if bl_para is None:
+        return []
+    if bl_para.kind == 0:
+        return [' '.join(words) for _, words in bl_para.lines]
+    return [''.join(frag.text for frag in line.words).strip() for line in bl_para.lines]
+
+
+def _content_hash(*parts: str) -> str:
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _flowable_size(value: Any) -> int:
+    flowables = value if isinstance(value, list) else [value]
+    return sum(len(getattr(f, 'text', '')) for f in flowables) + 1
+
+
+class LayoutCache:
+    """
+    Prewrapped flowables for block headers and bullets, keyed by id and a
+    hash of their content, so an export after a small edit only lays out
+    the blocks and bullets that changed.
+
+    Cached flowables are shared between requests, so builds that use them
+    are serialized (reportlab layout is pure Python and holds the GIL anyway).
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 8 * 1024 * 1024):
+        self.flowables = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=_flowable_size)
+        self.lock = threading.Lock()
+        self.reused = 0
+        self.built = 0
+
+    def _get(self, key: str, build):
+        value = self.flowables.get(key)
+        if value is None:
+            value = build()
+            self.flowables.put(key, value)
+            self.built += 1
+        else:
+            self.reused += 1
+        return value
+
+    def header(self, block: Dict[str, Any]) -> List[Flowable]:
+        block_id = block.get('id', '')
+        key = 'block:{}:{}'.format(block_id, _content_hash(
+            block['company'], block['title'], block['location'], block['dateRange']))
+
+        def build():
+            flowables = block_header(block, PrewrappedParagraph)
+            for flowable, field in zip(flowables, ('company', 'title', 'meta')):
+                flowable.layout_tag = {'blockId': block_id, 'bulletId': None, 'field': field}
+            return flowables
+
+        return self._get(key, build)
+
+    def bullet(self, item: Dict[str, Any], block_id: str) -> Flowable:
+        bullet_id = item.get('id', '')
+        key = 'bullet:{}:{}'.format(bullet_id, _content_hash(item['text']))
+
+        def build():
+            flowable = bullet_line(item, PrewrappedParagraph)
+            flowable.layout_tag = {'blockId': block_id, 'bulletId': bullet_id, 'field': 'bullet'}
+            return flowable
+
+        return self._get(key, build)
+
+    def elements(self, data: Dict[str, Any]) -> List[Flowable]:
+        # build_elements passes bullets on their own, so remember which
+        # block the current bullets belong to for their layout tags
+        current = {'blockId': ''}
+
+        def header(block: Dict[str, Any]) -> List[Flowable]:
+            current['blockId'] = block.get('id', '')
+            return self.header(block)
+
+        elements = build_elements(
+            data,
+            header=header,
+            bullet=lambda item: self.bullet(item, current['blockId']),
+        )
+        # Cached flowables are shared between builds, and reportlab keeps
+        # per-build state on the flowables it lays out (the page and frame
+        # they were placed in, whether they were pushed to the next page),
+        # so each build lays out copies; the copies share the wrap results
+        return [copy.copy(flowable) for flowable in elements]
+
+    def render(self, data: Dict[str, Any]) -> bytes:
+        """Render a PDF, reusing the layout of unchanged blocks and bullets."""
+        with self.lock:
+            return build_pdf(self.elements(data))
+
+    def layout(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Paginate without drawing and return where every paragraph lands.
+
+        Returns:
+            {'pages': n, 'items': [...], 'pageBreaks': [...]} where each
+            item has blockId, bulletId (bullets only), field, page, y (the
+            frame position below it, in points) and the text of each line.
+            pageBreaks lists the first item on every page after the first.
+        """
+        with self.lock:
+            doc = _LayoutDoc(BytesIO(), **PAGE_SETTINGS)
+            with stage('layout'):
+                doc.build(self.elements(data), canvasmaker=_LayoutCanvas)
+
+        page_breaks = []
+        last_page = 1
+        for item in doc.placements:
+            if item['page'] != last_page:
+                page_breaks.append({key: item[key] for key in ('page', 'blockId', 'bulletId', 'field')})
+                last_page = item['page']
+
+        return {'pages': doc.page, 'items': doc.placements, 'pageBreaks': page_breaks}
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.reused + self.built
+        return {
+            'reused': self.reused,
+            'built': self.built,
+            'reuseRate': round(self.reused / total, 4) if total else 0.0,
+            'entries': len(self.flowables),
+            'evictions': self.flowables.evictions,
+        }
+
+
+def create_layout_cache() -> LayoutCache:
+    """Build the layout cache from LAYOUT_CACHE_* environment variables."""
+    return LayoutCache(
+        max_entries=int(os.environ.get('LAYOUT_CACHE_ENTRIES', 4096)),
+        max_bytes=int(os.environ.get('LAYOUT_CACHE_MAX_BYTES', 8 * 1024 * 1024)),
+    )
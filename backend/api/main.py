@@ -1,18 +1,135 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import tempfile
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import json
 import os
+import time
 import sys
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from typing import AsyncIterator, Awaitable, List, Dict, Any, Iterator, Optional, Tuple, Union
+from pydantic import BaseModel, Field, ValidationError
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from parse import parse_resume
+from parse import DEFAULT_BACKEND, STOP_AFTER_EXPERIENCE
+from extractors import get_extractor
+from cache import create_export_cache, create_parse_cache
+from jobs import QueueFullError, create_parse_engine
+from batch import iter_batch_items, iter_batch_results
+from bulk_export import BULK_EXPORT_MAX_ITEMS, ExportItem, create_export_pool, entry_name, iter_bulk_export
+from uploads import InvalidUploadError, ReceivedUpload, UploadTooLargeError, receive_upload
+from metrics import (
+    PARSE_QUEUE_DEPTH, PARSES_IN_FLIGHT, MetricsMiddleware, render_metrics, stage
+)
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile as FormFile
+from export import remove_stale_exports, render_resume_pdf, resume_digest
+from layout import create_layout_cache
+from analyze import AnalysisError, AnalysisUnavailableError, create_component_analyzer
+from wire import WireRoute, encode_for, wire_response
+from bullet_index import create_bullet_index
+from previews import FORMATS, PageNotFoundError, create_preview_renderer, parse_preview_options
+from warmup import SAMPLE_RESUME, STARTUP, WARMUP, prime
+
+# Parse results keyed by upload content (see cache.py for PARSE_CACHE_* settings)
+parse_cache = create_parse_cache()
+
+# Rendered PDFs keyed by resume content (see cache.py for EXPORT_CACHE_* settings)
+export_cache = create_export_cache()
+
+# Prewrapped block and bullet layouts for incremental exports
+# (see layout.py for LAYOUT_CACHE_* settings)
+layout_cache = create_layout_cache()
+
+# Page images of recently parsed and exported PDFs (see previews.py for PREVIEW_* settings)
+preview_renderer = create_preview_renderer()
+
+# Pooled, cached Claude client for component analysis (see analyze.py for ANALYZE_* settings)
+component_analyzer = create_component_analyzer()
+
+# Most components accepted in one batch analysis
+ANALYZE_MAX_COMPONENTS = int(os.environ.get('ANALYZE_MAX_COMPONENTS', 200))
+
+# Search and near-duplicate index over the bullets of every parsed resume
+# (see bullet_index.py for BULLET_INDEX_* settings)
+bullet_index = create_bullet_index()
+
+# Worker processes that run PDF parsing off the event loop
+# (see jobs.py for PARSE_WORKERS / PARSE_QUEUE_SIZE settings)
+parse_engine = create_parse_engine()
+
+# Worker processes that render bulk exports (see bulk_export.py for EXPORT_WORKERS)
+export_pool = create_export_pool()
+
+# Most files (PDFs or ZIPs) accepted in one batch upload
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 1000))
+
+
+async def _warm_up() -> None:
+    """
+    Export and parse the sample resume in this process and in every worker
+    pool, and create the analysis client, then report ready (see warmup.py).
+    """
+    pdf = await run_in_threadpool(prime, layout_cache)
+    with STARTUP.step('analysisClient'):
+        component_analyzer.prepare()
+
+    async def step(name: str, warm: Awaitable[None]) -> None:
+        with STARTUP.step(name):
+            await warm
+
+    # The pools start their processes side by side
+    steps = [step('exportWorkers', export_pool.warm_up(SAMPLE_RESUME))]
+    if pdf is not None:
+        steps.append(step('parseWorkers', parse_engine.warm_up(pdf)))
+        steps.append(step('previewWorkers', preview_renderer.warm_up(pdf)))
+    await asyncio.gather(*steps)
+    STARTUP.mark_ready()
+    print(f"Worker {os.getpid()} warmed up: {STARTUP.summary()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    parse_engine.start()
+    preview_renderer.start()
+    export_pool.start()
+    # Clear out temp files generate_resume_pdf callers left behind
+    await run_in_threadpool(remove_stale_exports)
+    # WARMUP=blocking finishes warm-up before the server accepts connections,
+    # WARMUP=background lets /api/ready answer 503 while it runs
+    warm_up = None
+    if WARMUP == 'blocking':
+        await _warm_up()
+    elif WARMUP == 'background':
+        warm_up = asyncio.create_task(_warm_up())
+    else:
+        STARTUP.mark_ready()
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    await run_in_threadpool(bullet_index.save)
+    await component_analyzer.close()
+    export_pool.shutdown()
+    preview_renderer.shutdown()
+    parse_engine.shutdown()
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records JSON encoding as the 'serialize' stage."""
+
+    def render(self, content: Any) -> bytes:
+        with stage('serialize'):
+            return super().render(content)
 
-app = FastAPI(title="ResuBlocks API")
+
+app = FastAPI(title="ResuBlocks API", lifespan=lifespan, default_response_class=TimedJSONResponse)
+
+# Request bodies may use the compact wire format as well as JSON (see wire.py)
+app.router.route_class = WireRoute
 
 # CORS configuration
 app.add_middleware(
@@ -21,8 +138,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Document-Id"],
 )
 
+# Request latency, error and in-flight metrics plus Server-Timing headers
+# (set METRICS_ENABLED=0 to turn off)
+app.add_middleware(MetricsMiddleware)
+
 
 class BulletPoint(BaseModel):
     id: str
@@ -52,71 +174,605 @@ async def health():
     return {"status": "ok", "message": "ResuBlocks API is running"}
 
 
-@app.post("/api/parse-resume")
-async def parse_resume_endpoint(file: UploadFile = File(...)):
+@app.get("/api/ready")
+async def ready():
     """
-    Parse an uploaded PDF resume and return structured job blocks.
+    Readiness check for load balancers: 503 until this worker has warmed up.
+    Both responses include the worker's startup profile.
+    """
+    if not STARTUP.ready:
+        return JSONResponse(
+            {"status": "warming", "startup": STARTUP.to_dict()},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
+    return {"status": "ready", "startup": STARTUP.to_dict()}
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Request, stage and parse pool metrics in the Prometheus text format."""
+    stats = parse_engine.stats()
+    PARSES_IN_FLIGHT.set(stats['running'])
+    PARSE_QUEUE_DEPTH.set(stats['queueDepth'])
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the server-side caches."""
+    return {
+        "parse": parse_cache.stats(),
+        "export": export_cache.stats(),
+        "layout": layout_cache.stats(),
+        "previews": preview_renderer.stats(),
+        "analysis": component_analyzer.stats(),
+    }
+
+
+def _queue_full(e: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _check_backend(backend: Optional[str]) -> str:
+    backend = backend or DEFAULT_BACKEND
+    try:
+        get_extractor(backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return backend
+
+
+def _parse_options(
+    digest: str,
+    stop_after_experience: Optional[bool],
+    backend: Optional[str],
+) -> Tuple[str, Dict[str, Any]]:
+    """Resolve parse options to their defaults and build the cache key."""
+    if stop_after_experience is None:
+        stop_after_experience = STOP_AFTER_EXPERIENCE
+    backend = backend or DEFAULT_BACKEND
+    key = parse_cache.digest_key(digest, backend, f"stop={int(stop_after_experience)}")
+    return key, {'stop_after_experience': stop_after_experience, 'backend': backend}
+
+
+async def _parse_content(
+    source: Union[bytes, str],
+    stop_after_experience: Optional[bool] = None,
+    backend: Optional[str] = None,
+    digest: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Parse PDF bytes (or a spooled upload's path) in the worker pool, going
+    through the parse cache. digest is the content's SHA-256 when already known.
     """
-    if not file.filename.endswith('.pdf'):
+    if digest is None:
+        digest = hashlib.sha256(source).hexdigest()
+    
+    # Repeat uploads of the same file are served from the cache, and
+    # concurrent uploads of the same file share a single parse
+    key, options = _parse_options(digest, stop_after_experience, backend)
+    return await parse_cache.get_or_parse(
+        key,
+        lambda: parse_engine.run(source, **options),
+    )
+
+
+async def _receive(request: Request) -> ReceivedUpload:
+    """Receive the PDF uploaded in the request's `file` form field."""
+    try:
+        with stage('upload'):
+            upload = await receive_upload(request)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not upload.filename.endswith('.pdf'):
+        upload.close()
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    return upload
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _index_bullets(document_id: str, blocks: List[Dict[str, Any]]) -> None:
+    """Add a parsed resume's bullets to the bullet index; never fails the parse."""
+    try:
+        bullet_index.add_document(document_id, blocks)
+    except Exception as e:
+        print(f"Error indexing bullets: {str(e)}")
+
+
+async def _keep_for_preview(upload: ReceivedUpload) -> None:
+    """Keep an upload for /api/previews and render its first-page thumbnail."""
+    if upload.size > preview_renderer.documents.max_bytes:
+        return
+    content = upload.source
+    if isinstance(content, str):
+        content = await run_in_threadpool(_read_file, content)
+    preview_renderer.pregenerate(upload.digest, content)
+
+
+# The single-file parse endpoints read their multipart body themselves (see
+# uploads.receive_upload), so the upload is described for the API docs here
+PDF_UPLOAD_DOCS = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object",
+    "required": ["file"],
+    "properties": {"file": {"type": "string", "format": "binary"}},
+}}}}}
+
+
+@app.post("/api/parse-resume", openapi_extra=PDF_UPLOAD_DOCS)
+async def parse_resume_endpoint(
+    request: Request,
+    stop_after_experience: Optional[bool] = Query(None, alias="stopAfterExperience"),
+    backend: Optional[str] = Query(None),
+):
+    """
+    Parse an uploaded PDF resume and return structured job blocks.
     
+    With stopAfterExperience=true, pages after the end of the experience
+    section are not read. backend picks the text extraction backend
+    (pdfium, pdfplumber or pdfminer). The X-Document-Id header identifies
+    the PDF for /api/previews. Send Accept: application/vnd.resublocks.compact+json
+    for the compact format.
+    """
+    backend = _check_backend(backend)
+    
+    upload = await _receive(request)
     try:
-        # Save uploaded file to temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
-        # Parse the PDF
-        result = parse_resume(temp_path)
-        
-        # Clean up temporary file
-        os.unlink(temp_path)
+        result = await _parse_content(
+            upload.source, stop_after_experience, backend, upload.digest
+        )
         
         if 'error' in result:
             raise HTTPException(status_code=500, detail=result['error'])
         
-        return result
+        await _keep_for_preview(upload)
+        await run_in_threadpool(_index_bullets, upload.digest, result['blocks'])
+        return wire_response(request, result, headers={'X-Document-Id': upload.digest})
         
+    except QueueFullError as e:
+        raise _queue_full(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.close()
+
+
+def _format_event(event: Dict[str, Any], sse: bool) -> str:
+    if sse:
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+async def _stream_parse_events(
+    upload: ReceivedUpload,
+    key: str,
+    cached: Optional[Dict[str, Any]],
+    events: Optional[AsyncIterator[Dict[str, Any]]],
+    sse: bool,
+) -> AsyncIterator[str]:
+    """
+    Format the events of an incremental parse running in the worker pool
+    (see ParseJobEngine.stream), or the blocks of a cached result.
+    """
+    started = time.perf_counter()
+    blocks = []
+    try:
+        if cached is not None:
+            for block in cached['blocks']:
+                yield _format_event({'type': 'block', 'block': block}, sse)
+            await run_in_threadpool(_index_bullets, upload.digest, cached['blocks'])
+            yield _format_event({
+                'type': 'summary',
+                'blocks': len(cached['blocks']),
+                'cached': True,
+                'seconds': time.perf_counter() - started,
+            }, sse)
+            return
+        
+        async for event in events:
+            if event['type'] == 'block':
+                blocks.append(event['block'])
+            elif event['type'] == 'summary':
+                event = dict(event, cached=False, seconds=time.perf_counter() - started)
+                await run_in_threadpool(parse_cache.put, key, {'blocks': blocks})
+                await run_in_threadpool(_index_bullets, upload.digest, blocks)
+            yield _format_event(event, sse)
+    except Exception as e:
+        print(f"Error parsing PDF: {str(e)}")
+        yield _format_event({'type': 'error', 'error': str(e)}, sse)
+
+
+@app.post("/api/parse-resume/stream", openapi_extra=PDF_UPLOAD_DOCS)
+async def parse_resume_stream_endpoint(
+    request: Request,
+    stop_after_experience: Optional[bool] = Query(None, alias="stopAfterExperience"),
+    backend: Optional[str] = Query(None),
+):
+    """
+    Parse an uploaded PDF resume and stream progress and job blocks as they
+    are parsed, as newline-delimited JSON (or server-sent events when the
+    client accepts text/event-stream). See parse.iter_parse_events for the
+    event types. Parsing runs in the worker pool, so a full queue is a 503
+    as for /api/parse-resume.
+    """
+    backend = _check_backend(backend)
+    
+    upload = await _receive(request)
+    try:
+        key, options = _parse_options(upload.digest, stop_after_experience, backend)
+        sse = 'text/event-stream' in request.headers.get('accept', '')
+        await _keep_for_preview(upload)
+        cached = await run_in_threadpool(parse_cache.get, key)
+        events = None if cached is not None else parse_engine.stream(upload.source, **options)
+    except QueueFullError as e:
+        upload.close()
+        raise _queue_full(e)
+    except BaseException:
+        upload.close()
+        raise
+    
+    return StreamingResponse(
+        _stream_parse_events(upload, key, cached, events, sse),
+        media_type='text/event-stream' if sse else 'application/x-ndjson',
+        headers={'X-Document-Id': upload.digest},
+        # Also runs when the client disconnects before the stream ends
+        background=BackgroundTask(upload.close),
+    )
+
+
+@app.post("/api/parse-resume/batch")
+async def parse_resume_batch_endpoint(
+    request: Request,
+    concurrency: Optional[int] = Query(None, ge=1),
+    stop_after_experience: Optional[bool] = Query(None, alias="stopAfterExperience"),
+    backend: Optional[str] = Query(None),
+):
+    """
+    Parse many PDF resumes uploaded as multipart `files` (PDFs and/or ZIP
+    archives of PDFs). Results stream back as newline-delimited JSON, one
+    line per file as soon as it finishes, followed by a summary line with
+    throughput and latency figures. A failing file is reported on its own
+    line and does not stop the batch. With Accept:
+    application/vnd.resublocks.compact+json, each line is in the compact format.
+    """
+    backend = _check_backend(backend)
+    
+    # The form is read here rather than through File(...) parameters so the
+    # spooled uploads stay open while the response is streamed
+    form = await request.form(max_files=BATCH_MAX_FILES)
+    uploads = [value for _, value in form.multi_items() if isinstance(value, FormFile)]
+    if not uploads:
+        await form.close()
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    
+    # More parses in flight than the engine can queue would only be rejected
+    concurrency = min(
+        concurrency or parse_engine.workers,
+        parse_engine.workers + parse_engine.max_queue,
+    )
+    
+    async def parse(content: bytes) -> Dict[str, Any]:
+        digest = hashlib.sha256(content).hexdigest()
+        result = await _parse_content(content, stop_after_experience, backend, digest)
+        if 'error' not in result:
+            await run_in_threadpool(_index_bullets, digest, result['blocks'])
+        return result
+    
+    async def stream():
+        try:
+            results = iter_batch_results(iter_batch_items(uploads), parse, concurrency)
+            async for event in results:
+                yield encode_for(request, event) + b"\n"
+        finally:
+            await form.close()
+    
+    return StreamingResponse(stream(), media_type='application/x-ndjson', headers={'Vary': 'Accept'})
+
+
+@app.post("/api/parse-jobs", status_code=202, openapi_extra=PDF_UPLOAD_DOCS)
+async def submit_parse_job(
+    request: Request,
+    stop_after_experience: Optional[bool] = Query(None, alias="stopAfterExperience"),
+    backend: Optional[str] = Query(None),
+):
+    """
+    Queue an uploaded PDF resume for parsing and return a job id.
+    Poll GET /api/parse-jobs/{job_id} for the result.
+    """
+    backend = _check_backend(backend)
+    
+    upload = await _receive(request)
+    
+    async def job() -> Dict[str, Any]:
+        try:
+            result = await _parse_content(
+                upload.source, stop_after_experience, backend, upload.digest
+            )
+            if 'error' not in result:
+                await _keep_for_preview(upload)
+                await run_in_threadpool(_index_bullets, upload.digest, result['blocks'])
+            return result
+        finally:
+            upload.close()
+    
+    try:
+        job_id = parse_engine.submit(job)
+    except QueueFullError as e:
+        upload.close()
+        raise _queue_full(e)
+    
+    return {"jobId": job_id, "status": "pending", "documentId": upload.digest}
+
+
+@app.get("/api/parse-jobs/stats")
+async def parse_job_stats():
+    """Queue depth, wait time and run time of the parse worker pool."""
+    return parse_engine.stats()
+
+
+@app.get("/api/parse-jobs/{job_id}")
+async def get_parse_job(job_id: str, request: Request):
+    """
+    Return the status of a parse job, plus its blocks once it has succeeded.
+    """
+    job = parse_engine.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return wire_response(request, job)
 
 
 @app.post("/api/export-resume")
-async def export_resume_endpoint(data: ResumeData):
+async def export_resume_endpoint(
+    data: ResumeData,
+    incremental: bool = Query(False),
+):
     """
     Generate a PDF from edited resume blocks.
+    
+    The PDF is rendered in memory, and exports of unchanged content are
+    served from the export cache. With incremental=true, blocks and bullets
+    unchanged since an earlier incremental export (same id and content)
+    reuse their cached layout, which suits repeated live-preview exports.
+    The X-Document-Id header identifies the PDF for /api/previews.
     """
     try:
-        from export import generate_resume_pdf
+        resume = data.dict()
+        key = resume_digest(resume)
+        
+        pdf = export_cache.get(key)
+        if pdf is None:
+            render = layout_cache.render if incremental else render_resume_pdf
+            pdf = await run_in_threadpool(render, resume)
+            export_cache.put(key, pdf)
         
-        # Generate PDF
-        pdf_path = generate_resume_pdf(data.dict())
+        document_id = hashlib.sha256(pdf).hexdigest()
+        preview_renderer.pregenerate(document_id, pdf)
         
-        # Return PDF file
-        return FileResponse(
-            pdf_path,
+        return Response(
+            pdf,
             media_type='application/pdf',
-            filename='resume_export.pdf'
+            headers={
+                'Content-Disposition': 'attachment; filename="resume_export.pdf"',
+                'X-Document-Id': document_id,
+            },
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _bulk_export_items(payloads: List[Dict[str, Any]]) -> Iterator[ExportItem]:
+    """Validate bulk export payloads one at a time, keeping invalid ones as errors."""
+    used = set()
+    for index, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            yield ExportItem(entry_name(None, index, used), error="Invalid resume: expected a JSON object")
+            continue
+        name = payload.get('name')
+        name = entry_name(name if isinstance(name, str) else None, index, used)
+        try:
+            yield ExportItem(name, resume=ResumeData(**payload).dict())
+        except ValidationError as e:
+            yield ExportItem(name, error=f"Invalid resume: {str(e)}")
+
+
+async def _render_for_bulk(resume: Dict[str, Any]) -> bytes:
+    key = resume_digest(resume)
+    pdf = export_cache.get(key)
+    if pdf is None:
+        pdf = await export_pool.render(resume)
+        export_cache.put(key, pdf)
+    return pdf
+
+
+@app.post("/api/export-resume/bulk")
+async def bulk_export_endpoint(
+    payloads: List[Any] = Body(...),
+    concurrency: Optional[int] = Query(None, ge=1),
+):
+    """
+    Export many resumes as one ZIP of PDFs.
+    
+    The body is a JSON list of resumes (each like /api/export-resume's
+    body, with an optional "name" for its file). PDFs are rendered in the
+    export worker pool and the ZIP is streamed as each one finishes. A
+    resume that is invalid or fails to render is left out of the archive
+    and reported in its final manifest.json entry.
+    """
+    if not payloads:
+        raise HTTPException(status_code=400, detail="No resumes to export")
+    if len(payloads) > BULK_EXPORT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_EXPORT_MAX_ITEMS} resumes can be exported at once",
+        )
+    
+    # Two renders per worker keep every worker busy while results are zipped
+    concurrency = min(concurrency or export_pool.workers * 2, len(payloads))
+    
+    return StreamingResponse(
+        iter_bulk_export(_bulk_export_items(payloads), _render_for_bulk, concurrency),
+        media_type='application/zip',
+        headers={'Content-Disposition': 'attachment; filename="resumes.zip"'},
+    )
+
+
+@app.post("/api/export-resume/layout")
+async def export_layout_endpoint(data: ResumeData, request: Request):
+    """
+    Paginate resume blocks without producing a PDF and return the page and
+    line breaks, so a live preview can update while the user types.
+    """
+    try:
+        layout = await run_in_threadpool(layout_cache.layout, data.dict())
+        return wire_response(request, layout)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/previews/{document_id}/pages/{page}")
+async def page_preview_endpoint(
+    document_id: str,
+    page: int,
+    width: int = Query(600),
+    image_format: str = Query("png", alias="format"),
+):
+    """
+    Render a page (1-based) of a recently parsed or exported PDF as a PNG or
+    WebP image, width pixels wide. document_id is the X-Document-Id header of
+    the parse or export response. The first page at width=200 in PNG is
+    rendered ahead of time.
+    """
+    try:
+        width, image_format = parse_preview_options(width, image_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page < 1:
+        raise HTTPException(status_code=404, detail="Page not found")
+    
+    try:
+        image = await preview_renderer.render(document_id, page, width, image_format)
+    except PageNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if image is None:
+        raise HTTPException(status_code=404, detail="Document not found or expired")
+    
+    # Document ids are content hashes, so a rendered page never changes
+    return Response(
+        image,
+        media_type=FORMATS[image_format],
+        headers={'Cache-Control': 'public, max-age=86400, immutable'},
+    )
+
+
+class DedupRequest(BaseModel):
+    bullets: List[BulletPoint]
+    threshold: float = Field(0.6, gt=0, le=1)
+    k: int = Field(5, ge=1, le=100)
+
+
+@app.get("/api/bullets/search")
+async def search_bullets_endpoint(
+    q: str = Query(..., min_length=1),
+    k: int = Query(10, ge=1, le=100),
+):
+    """
+    Keyword search over the bullets of every parsed resume. Bullets are
+    ranked by how rare the query words they contain are.
+    """
+    try:
+        return {"results": await run_in_threadpool(bullet_index.search, q, k)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/bullets/dedup")
+async def dedup_bullets_endpoint(request: DedupRequest):
+    """
+    Find near-duplicates of each given bullet among the bullets of every
+    parsed resume (word-pair Jaccard similarity of at least threshold).
+    An indexed bullet with the same id as a given one is not reported.
+    """
+    def lookup() -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": bullet.id,
+                "duplicates": bullet_index.near_duplicates(
+                    bullet.text, request.threshold, request.k, exclude_id=bullet.id
+                ),
+            }
+            for bullet in request.bullets
+        ]
+    
+    try:
+        return {"results": await run_in_threadpool(lookup)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/bullets/stats")
+async def bullet_index_stats():
+    """Size, file and query counters of the bullet index."""
+    return await run_in_threadpool(bullet_index.stats)
+
+
+def _analysis_error(e: Exception) -> HTTPException:
+    if isinstance(e, AnalysisUnavailableError):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, AnalysisError):
+        return HTTPException(status_code=502, detail=f"Analysis failed: {str(e)}")
+    print(f"Error analyzing component: {str(e)}")
+    return HTTPException(status_code=500, detail="Analysis failed")
+
+
 @app.post("/api/analyze-component")
 async def analyze_component_endpoint(component: Dict[str, Any]):
     """
-    Analyze a resume component using AI (Claude).
+    Analyze a resume component (a job block or a bullet) using AI (Claude).
+    
+    Returns {score, feedback, suggestions}. Analyses are cached by the
+    component's content, ignoring ids and whitespace.
     """
     try:
-        from analyze import analyze_component_ai
-        
-        result = analyze_component_ai(component)
-        return result
-        
+        return await component_analyzer.analyze(component)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _analysis_error(e)
+
+
+@app.post("/api/analyze-component/batch")
+async def analyze_components_endpoint(components: List[Dict[str, Any]] = Body(...)):
+    """
+    Analyze many resume components, e.g. every block and bullet of a resume.
+    
+    Uncached components are sent to the model in batches rather than one
+    call each. Returns {"results": [...]} in request order; a component
+    that could not be analyzed has an "error" instead of a score.
+    """
+    if len(components) > ANALYZE_MAX_COMPONENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {ANALYZE_MAX_COMPONENTS} components can be analyzed at once",
+        )
+    try:
+        return {"results": await component_analyzer.analyze_many(components)}
+    except Exception as e:
+        raise _analysis_error(e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Set METRICS_ENABLED=0 to turn every timer into a no-op
+ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Latency buckets in seconds, from sub-millisecond stages to slow exports
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(labels)} {value:g}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. requests in flight."""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus text format."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((labels, list(counts)) for labels, counts in self._values.items())
+        for labels, counts in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                yield f"{self.name}_bucket{_format_labels(labels, ('le', le))} {cumulative:g}"
+            yield f"{self.name}_sum{_format_labels(labels)} {counts[-1]:.6f}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative:g}"
+
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Request latency until the response has been sent')
+REQUESTS = Counter('http_requests_total', 'Requests handled, by endpoint and status')
+REQUEST_ERRORS = Counter('http_request_errors_total', 'Requests that failed with a 4xx/5xx status or an exception')
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being handled')
+STAGE_SECONDS = Histogram('resume_stage_duration_seconds', 'Time spent per processing stage and request')
+PARSES_IN_FLIGHT = Gauge('resume_parses_in_flight', 'Parses running in the worker pool')
+PARSE_QUEUE_DEPTH = Gauge('resume_parse_queue_depth', 'Parses waiting for a free worker')
+
+REGISTRY = [REQUEST_SECONDS, REQUESTS, REQUEST_ERRORS, IN_FLIGHT, STAGE_SECONDS,
+            PARSES_IN_FLIGHT, PARSE_QUEUE_DEPTH]
+
+
+def render_metrics() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+class StageTimer:
+    """Per-request stage durations, summed by stage name."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def observe(self) -> None:
+        """Record the summed stages in STAGE_SECONDS, once per request."""
+        for name, seconds in self.stages.items():
+            STAGE_SECONDS.observe(seconds, stage=name)
+
+    def server_timing(self) -> str:
+        """Stages so far as a Server-Timing header value (milliseconds)."""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ', '.join(entries)
+
+
+_current: ContextVar[Optional[StageTimer]] = ContextVar('stage_timer', default=None)
+
+
+def _record(name: str, seconds: float) -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+    else:
+        STAGE_SECONDS.observe(seconds, stage=name)
+
+
+class _Stage:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        _record(self.name, time.perf_counter() - self.started)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """
+    Context manager timing one processing stage of the current request.
+
+    With metrics disabled this returns a shared no-op object, so hooks can
+    stay in hot paths.
+    """
+    if not ENABLED:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+def record_stages(stages: Dict[str, float]) -> None:
+    """Add stage timings measured elsewhere (e.g. in a worker process)."""
+    if not ENABLED:
+        return
+    for name, seconds in stages.items():
+        _record(name, seconds)
+
+
+@contextmanager
+def collect_stages() -> Iterator[StageTimer]:
+    """Collect the stages timed inside the block into a new StageTimer."""
+    timer = StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, status and in-flight counts
+    per route, and adding a Server-Timing header with the stages timed
+    before the response started.
+
+    Endpoints are labelled by their route template (e.g.
+    /api/parse-jobs/{job_id}) so ids do not create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _endpoint(scope) -> str:
+        from starlette.routing import Match
+
+        for route in scope['app'].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, 'path', scope['path'])
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if not ENABLED or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        method = scope['method']
+        status = 500
+        IN_FLIGHT.inc(endpoint=endpoint)
+
+        with collect_stages() as timer:
+            async def send_with_timing(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+                    headers = list(message.get('headers', []))
+                    headers.append((b'server-timing', timer.server_timing().encode('latin-1')))
+                    message = dict(message, headers=headers)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                IN_FLIGHT.dec(endpoint=endpoint)
+                # Streamed bodies have been sent by now, so their stages count too
+                timer.observe()
+                REQUEST_SECONDS.observe(time.perf_counter() - timer.started, endpoint=endpoint)
+                REQUESTS.inc(method=method, endpoint=endpoint, status=status)
+                if status >= 400:
+                    REQUEST_ERRORS.inc(endpoint=endpoint, status=status)
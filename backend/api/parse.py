@@ -1,31 +1,81 @@
-import pdfplumber
+import os
 import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
 from uuid import uuid4
-from typing import List, Dict, Any
+from typing import Callable, Iterable, Iterator, List, Dict, Any, NamedTuple, Optional
+
+from extractors import FALLBACKS, PdfSource, get_extractor
+from metrics import stage
+
+
+# Bump whenever parsing output changes so cached results are not reused.
+PARSER_VERSION = "2"
+
+# Text extraction backend used when a request does not pick one (see extractors.py)
+DEFAULT_BACKEND = os.environ.get('PARSE_BACKEND', 'pdfium')
+
+# Pages extracted concurrently per parse (1 = extract in this process)
+PAGE_WORKERS = int(os.environ.get('PARSE_PAGE_WORKERS', 1))
+
+# Stop extracting pages once the experience section has ended
+STOP_AFTER_EXPERIENCE = os.environ.get('PARSE_STOP_AFTER_EXPERIENCE', '').lower() in ('1', 'true', 'yes')
+
+EXPERIENCE_HEADING = re.compile(r'(?i)(experience|employment|work history)')
+
+# Headings of sections that usually follow the experience section
+LATER_SECTION_HEADING = re.compile(
+    r'(?i)^\s*(education|skills|technical skills|projects|personal projects|'
+    r'certifications|awards|volunteer|interests)\b.{0,30}$'
+)
+
+# Bullet markers, including glyphs pdfminer could not map to unicode ("(cid:127)")
+BULLET_LINE = re.compile(r'^\s*([•●○■▪\-*]|\(cid:\d+\))', re.MULTILINE)
+
+
+# Date range patterns in order of preference, as one pattern:
+# "May 2024 - Aug 2024", "May 2024 - Present", "2024 - 2025", "May 2024".
+# Each alternative scans the whole text (.*?) before the next one is tried,
+# so an earlier pattern anywhere in the line wins over a later one at its
+# start, and the group that matched holds the date range.
+DATE_PATTERN = re.compile(
+    r'.*?(\w+ \d{4}\s*-\s*\w+ \d{4})'
+    r'|.*?(\w+ \d{4}\s*-\s*Present)'
+    r'|.*?(\d{4}\s*-\s*\d{4})'
+    r'|.*?(\w+\s*\d{4})',
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Every date pattern needs a 4-digit year, so lines without one skip the
+# pattern, which would otherwise try all four alternatives at every offset
+YEAR = re.compile(r'\d{4}')
+
+# "Toronto, ON" or "San Francisco, CA"
+LOCATION_PATTERN = re.compile(r'([A-Za-z\s]+,\s*[A-Z]{2,})')
+
+BULLET_MARKERS = ['•', '●', '○', '■', '▪', '-', '*']
+BULLET_MARKER_CHARS = frozenset(BULLET_MARKERS)
 
 
 def extract_date_range(text: str) -> str:
     """Extract date range from text using common patterns."""
-    # Patterns: "May 2024 - Aug 2024", "2024-2025", "Jan 2024 - Present"
-    date_patterns = [
-        r'(\w+ \d{4}\s*-\s*\w+ \d{4})',  # May 2024 - Aug 2024
-        r'(\w+ \d{4}\s*-\s*Present)',     # May 2024 - Present
-        r'(\d{4}\s*-\s*\d{4})',           # 2024 - 2025
-        r'(\w+\s*\d{4})',                  # May 2024 (single date)
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    return ""
+    if not YEAR.search(text):
+        return ""
+    
+    match = DATE_PATTERN.match(text)
+    return match.group(match.lastindex) if match else ""
 
 
 def extract_location(text: str) -> str:
     """Extract location from text (City, State/Province pattern)."""
-    # Pattern: "Toronto, ON" or "San Francisco, CA"
-    location_pattern = r'([A-Za-z\s]+,\s*[A-Z]{2,})'
-    match = re.search(location_pattern, text)
+    # Without a comma the pattern cannot match, and searching for it
+    # backtracks over every run of letters in the line
+    if ',' not in text:
+        return ""
+    
+    match = LOCATION_PATTERN.search(text)
     if match:
         return match.group(1)
     return ""
@@ -35,11 +85,10 @@ def is_bullet_point(line: str) -> bool:
     """Check if a line is a bullet point."""
     line = line.strip()
     # Check for bullet markers
-    bullet_markers = ['•', '●', '○', '■', '▪', '-', '*']
-    if any(line.startswith(marker) for marker in bullet_markers):
+    if line[:1] in BULLET_MARKER_CHARS:
         return True
     
-    # Check for indented lines (4+ spaces)
+    # Check for lines that continue a sentence (long and not capitalized)
     if line and not line[0].isupper() and len(line) > 20:
         return True
     
@@ -49,132 +98,462 @@ def is_bullet_point(line: str) -> bool:
 def clean_bullet_text(text: str) -> str:
     """Remove bullet markers and clean up text."""
     text = text.strip()
-    # Remove common bullet markers
-    for marker in ['•', '●', '○', '■', '▪', '-', '*']:
+    if text[:1] not in BULLET_MARKER_CHARS:
+        return text
+    
+    # Markers are stripped in list order, so "• - text" loses both
+    for marker in BULLET_MARKERS:
         if text.startswith(marker):
             text = text[1:].strip()
     return text
 
 
+class JobState:
+    """Job blocks built so far while classifying lines of the experience section."""
+
+    def __init__(self):
+        self.blocks: List[Dict[str, Any]] = []
+        self.job: Optional[Dict[str, Any]] = None
+        self.bullets: List[Dict[str, str]] = []
+
+    def start_job(self, company: str) -> None:
+        self.finish_job()
+        self.job = {
+            'id': str(uuid4()),
+            'company': company,
+            'title': '',
+            'location': '',
+            'dateRange': '',
+            'bullets': []
+        }
+        self.bullets = []
+
+    def finish_job(self) -> None:
+        # Jobs without any bullets are dropped
+        if self.job and self.bullets:
+            self.job['bullets'] = self.bullets
+            self.blocks.append(self.job)
+        self.job = None
+
+
+class LineRule(NamedTuple):
+    """
+    One row of the line classifier.
+
+    claims decides whether the rule owns a line given the current state;
+    the first rule that claims a line is the only one that sees it. extract
+    returns the value to record, or '' to label the line a continuation.
+    apply stores the value on the state.
+    """
+    label: str
+    claims: Callable[[str, JobState], bool]
+    extract: Callable[[str], str]
+    apply: Callable[[JobState, str], None]
+
+
+def _set_field(field: str) -> Callable[[JobState, str], None]:
+    def apply(state: JobState, value: str) -> None:
+        state.job[field] = value
+    return apply
+
+
+def _needs_field(field: str) -> Callable[[str, JobState], bool]:
+    def claims(line: str, state: JobState) -> bool:
+        return state.job is not None and not state.job[field]
+    return claims
+
+
+def _extract_title(line: str) -> str:
+    return line if 10 < len(line) < 80 else ''
+
+
+def _extract_bullet(line: str) -> str:
+    bullet_text = clean_bullet_text(line)
+    return bullet_text if len(bullet_text) > 15 else ''
+
+
+def _add_bullet(state: JobState, text: str) -> None:
+    state.bullets.append({'id': str(uuid4()), 'text': text})
+
+
+# A company line (all caps) always starts a new job. Otherwise a job fills
+# in its date, then location, then title in that order, and every line
+# after that is a candidate bullet.
+LINE_RULES: List[LineRule] = [
+    LineRule(
+        'company',
+        lambda line, state: line.isupper() and 5 < len(line) < 60,
+        lambda line: line,
+        JobState.start_job,
+    ),
+    LineRule('date', _needs_field('dateRange'), extract_date_range, _set_field('dateRange')),
+    LineRule('location', _needs_field('location'), extract_location, _set_field('location')),
+    LineRule(
+        'title',
+        lambda line, state: _needs_field('title')(line, state) and not is_bullet_point(line),
+        _extract_title,
+        _set_field('title'),
+    ),
+    LineRule(
+        'bullet',
+        lambda line, state: state.job is not None and is_bullet_point(line),
+        _extract_bullet,
+        _add_bullet,
+    ),
+]
+
+
+def classify_line(line: str, state: JobState) -> str:
+    """
+    Label a stripped, non-empty line and apply it to the state.
+    
+    Returns:
+        The label of the rule that used the line, or 'continuation'
+    """
+    for rule in LINE_RULES:
+        if rule.claims(line, state):
+            value = rule.extract(line)
+            if not value:
+                return 'continuation'
+            rule.apply(state, value)
+            return rule.label
+    return 'continuation'
+
+
+class JobParser:
+    """
+    Incremental version of extract_jobs_from_text: feed it lines one at a
+    time and it returns each job block as soon as the block is complete.
+    
+    Lines before the experience heading are held back; if the text has no
+    experience heading at all, close() parses them instead.
+    """
+
+    def __init__(self):
+        self.state = JobState()
+        self._preamble: Optional[List[str]] = []
+
+    def _classify(self, line: str) -> List[Dict[str, Any]]:
+        line = line.strip()
+        if line:
+            classify_line(line, self.state)
+        return self._drain()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        blocks = self.state.blocks
+        self.state.blocks = []
+        return blocks
+
+    def feed(self, line: str) -> List[Dict[str, Any]]:
+        """Consume one line and return the blocks it completed."""
+        if self._preamble is None:
+            return self._classify(line)
+        
+        if EXPERIENCE_HEADING.search(line):
+            # Everything before the experience heading is ignored
+            self._preamble = None
+        else:
+            self._preamble.append(line)
+        return []
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish parsing and return the remaining blocks."""
+        blocks = []
+        if self._preamble is not None:
+            # No experience section found, try parsing the whole document
+            # (the first line is skipped, as it would be the heading)
+            preamble, self._preamble = self._preamble, None
+            for line in preamble[1:]:
+                blocks.extend(self._classify(line))
+        
+        # Add last job
+        self.state.finish_job()
+        blocks.extend(self._drain())
+        return blocks
+
+
+def iter_jobs_from_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield job blocks from lines of text as each block is completed."""
+    parser = JobParser()
+    for line in lines:
+        yield from parser.feed(line)
+    yield from parser.close()
+
+
 def extract_jobs_from_text(text: str) -> List[Dict[str, Any]]:
     """Parse text and extract job blocks."""
-    blocks = []
-    lines = text.split('\n')
-    
-    # Find experience section
-    exp_section_start = -1
-    for i, line in enumerate(lines):
-        if re.search(r'(?i)(experience|employment|work history)', line):
-            exp_section_start = i
-            break
+    return list(iter_jobs_from_lines(text.split('\n')))
+
+
+class SectionTracker:
+    """
+    Follows extracted text page by page to tell when the experience
+    section is over, i.e. a later section heading (education, skills,
+    projects...) has been seen after the experience heading.
+    """
+
+    def __init__(self):
+        self.in_experience = False
+        self.finished = False
+
+    def feed(self, page_text: str) -> bool:
+        """Consume one page of text and return True once the section has ended."""
+        for line in page_text.split('\n'):
+            if not self.in_experience:
+                # Same rule extract_jobs_from_text uses to find the section
+                if EXPERIENCE_HEADING.search(line):
+                    self.in_experience = True
+            elif LATER_SECTION_HEADING.match(line):
+                self.finished = True
+                break
+        return self.finished
+
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_size = 0
+_page_pool_pid = 0
+
+
+def _shutdown_page_pool() -> None:
+    """
+    Stop this process's page workers. Runs before a parse worker exits,
+    which would otherwise wait forever to join its idle page workers.
+    """
+    global _page_pool
+    if _page_pool is not None and _page_pool_pid == os.getpid():
+        _page_pool.shutdown(wait=True, cancel_futures=True)
+    _page_pool = None
+
+
+def _get_page_pool(workers: int) -> ProcessPoolExecutor:
+    global _page_pool, _page_pool_size, _page_pool_pid
+    if _page_pool is not None and _page_pool_pid != os.getpid():
+        # Inherited through fork: its manager thread only exists in the parent
+        _page_pool = None
+    if _page_pool is None or _page_pool_size != workers:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False)
+        else:
+            # Runs before multiprocessing joins this process's children on
+            # exit, and before the pool's queues close (exit priority 10)
+            Finalize(None, _shutdown_page_pool, exitpriority=100)
+        _page_pool = ProcessPoolExecutor(max_workers=workers)
+        _page_pool_size = workers
+        _page_pool_pid = os.getpid()
+    return _page_pool
+
+
+def _extract_page_text(source: PdfSource, page_number: int, backend: str) -> str:
+    """Extract the text of a single page (runs in a page worker)."""
+    return get_extractor(backend).extract_page(source, page_number)
+
+
+def iter_page_texts(
+    source: PdfSource,
+    page_workers: int = 1,
+    stop_after_experience: bool = False,
+    backend: str = 'pdfplumber',
+) -> Iterator[str]:
+    """
+    Yield the text of each page, in page order, as soon as it is extracted.
     
-    if exp_section_start == -1:
-        # No experience section found, try parsing the whole document
-        exp_section_start = 0
+    Args:
+        source: Path to the PDF file, its bytes, or a binary file object
+        page_workers: Number of pages extracted concurrently in separate
+            processes (pdfminer is pure Python, so threads would not help)
+        stop_after_experience: Skip the remaining pages once a section
+            heading following the experience section has been seen
+        backend: Name of the text extraction backend (see extractors.py)
+        
+    Yields:
+        Page texts (empty string for pages without text)
+    """
+    extractor = get_extractor(backend)
+    tracker = SectionTracker() if stop_after_experience else None
     
-    # Parse jobs from experience section
-    current_job = None
-    current_bullets = []
+    page_count = extractor.page_count(source) if page_workers > 1 else 1
+    if page_count <= 1:
+        pages = extractor.iter_page_texts(source)
+        try:
+            for text in pages:
+                yield text
+                if tracker and tracker.feed(text):
+                    break
+        finally:
+            pages.close()
+        return
     
-    for i in range(exp_section_start + 1, len(lines)):
-        line = lines[i].strip()
-        
-        if not line:
-            continue
+    # Page workers need a source they can unpickle
+    if not isinstance(source, (str, bytes)):
+        source.seek(0)
+        source = source.read()
+    
+    # Keep page_workers pages in flight and collect them in order, so the
+    # early stop check sees pages in the same order as the sequential path
+    pool = _get_page_pool(page_workers)
+    next_page = 0
+    in_flight = deque()
+    try:
+        while next_page < page_count and len(in_flight) < page_workers:
+            in_flight.append(pool.submit(_extract_page_text, source, next_page, backend))
+            next_page += 1
         
-        # Check if this might be a new job (all caps or bold indicators)
-        if line.isupper() and len(line) > 5 and len(line) < 60:
-            # Save previous job
-            if current_job and current_bullets:
-                current_job['bullets'] = current_bullets
-                blocks.append(current_job)
-            
-            # Start new job
-            current_job = {
+        while in_flight:
+            text = in_flight.popleft().result()
+            yield text
+            if tracker and tracker.feed(text):
+                break
+            if next_page < page_count:
+                in_flight.append(pool.submit(_extract_page_text, source, next_page, backend))
+                next_page += 1
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def passes_quality_check(text: str) -> bool:
+    """
+    Cheap check that extracted text looks like something the parser can use:
+    it must contain an experience heading and at least one bullet marker.
+    """
+    return bool(EXPERIENCE_HEADING.search(text)) and bool(BULLET_LINE.search(text))
+
+
+# Bullet text of the block returned when nothing could be parsed
+PLACEHOLDER_BULLET = 'PDF parsing failed. Please enter your experience manually.'
+
+
+def _placeholder_block() -> Dict[str, Any]:
+    return {
+        'id': str(uuid4()),
+        'company': 'Could not parse company name',
+        'title': 'Please review and edit manually',
+        'location': 'Location not found',
+        'dateRange': 'Date range not found',
+        'bullets': [
+            {
                 'id': str(uuid4()),
-                'company': line,
-                'title': '',
-                'location': '',
-                'dateRange': '',
-                'bullets': []
+                'text': PLACEHOLDER_BULLET
             }
-            current_bullets = []
+        ]
+    }
+
+
+def iter_parse_events(
+    source: PdfSource,
+    stop_after_experience: Optional[bool] = None,
+    page_workers: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Parse a PDF resume incrementally, yielding events as work completes:
+    
+    - {'type': 'progress', 'page': n, 'backend': name} after each page
+    - {'type': 'block', 'block': {...}} for each completed job block
+    - {'type': 'fallback', 'from': name, 'to': name} when the extracted text
+      fails passes_quality_check and parsing restarts with the next backend
+    - {'type': 'summary', 'blocks': n, 'pages': n, 'backend': name,
+      'attempts': [...]} once at the end
+    
+    While a fallback backend is still possible, blocks are held back until
+    the quality check has passed, so no block is emitted twice. Arguments
+    are the same as parse_resume.
+    """
+    if stop_after_experience is None:
+        stop_after_experience = STOP_AFTER_EXPERIENCE
+    if page_workers is None:
+        page_workers = PAGE_WORKERS
+    if backend is None:
+        backend = DEFAULT_BACKEND
+    
+    attempts = []
+    while True:
+        started = time.perf_counter()
+        fallback = FALLBACKS.get(backend)
+        parser = JobParser()
+        held: List[Dict[str, Any]] = []
+        # Page texts read so far, kept only until the quality check passes
+        checked: List[str] = []
+        passed = fallback is None
+        emitted = 0
+        page_count = 0
+        
+        for text in iter_page_texts(source, page_workers, stop_after_experience, backend):
+            page_count += 1
+            if text:
+                if not passed:
+                    checked.append(text)
+                    passed = passes_quality_check('\n'.join(checked))
+                    if passed:
+                        checked = []
+                with stage('classify'):
+                    for line in text.split('\n'):
+                        held.extend(parser.feed(line))
             
-        # Check for date range
-        elif current_job and not current_job['dateRange']:
-            date_range = extract_date_range(line)
-            if date_range:
-                current_job['dateRange'] = date_range
-                
-        # Check for location
-        elif current_job and not current_job['location']:
-            location = extract_location(line)
-            if location:
-                current_job['location'] = location
-                
-        # Check for job title (usually after company)
-        elif current_job and not current_job['title'] and not is_bullet_point(line):
-            if len(line) > 10 and len(line) < 80:
-                current_job['title'] = line
-                
-        # Check for bullet points
-        elif current_job and is_bullet_point(line):
-            bullet_text = clean_bullet_text(line)
-            if bullet_text and len(bullet_text) > 15:
-                current_bullets.append({
-                    'id': str(uuid4()),
-                    'text': bullet_text
-                })
-    
-    # Add last job
-    if current_job and current_bullets:
-        current_job['bullets'] = current_bullets
-        blocks.append(current_job)
-    
-    return blocks
-
-
-def parse_resume(pdf_path: str) -> Dict[str, Any]:
+            yield {'type': 'progress', 'page': page_count, 'backend': backend}
+            if passed:
+                for block in held:
+                    yield {'type': 'block', 'block': block}
+                emitted += len(held)
+                held = []
+        
+        held.extend(parser.close())
+        attempts.append({'backend': backend, 'seconds': time.perf_counter() - started})
+        if passed:
+            break
+        
+        yield {'type': 'fallback', 'from': backend, 'to': fallback}
+        backend = fallback
+    
+    for block in held:
+        yield {'type': 'block', 'block': block}
+    emitted += len(held)
+    
+    # If no blocks found, return sample data
+    if not emitted:
+        yield {'type': 'block', 'block': _placeholder_block()}
+        emitted = 1
+    
+    yield {
+        'type': 'summary',
+        'blocks': emitted,
+        'pages': page_count,
+        'backend': backend,
+        'attempts': attempts,
+    }
+
+
+def parse_resume(
+    source: PdfSource,
+    stop_after_experience: Optional[bool] = None,
+    page_workers: Optional[int] = None,
+    backend: Optional[str] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     Parse a PDF resume and extract job blocks.
     
     Args:
-        pdf_path: Path to the PDF file
+        source: Path to the PDF file, its bytes, or a binary file object
+        stop_after_experience: Stop reading pages once the experience section
+            has ended (defaults to PARSE_STOP_AFTER_EXPERIENCE)
+        page_workers: Pages extracted concurrently (defaults to PARSE_PAGE_WORKERS)
+        backend: Text extraction backend (defaults to PARSE_BACKEND)
+        stats: Optional dict that receives extraction backend and timings
         
     Returns:
         Dictionary with 'blocks' containing list of job blocks
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # Extract text from all pages
-            full_text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + "\n"
-            
-            # Parse jobs from text
-            blocks = extract_jobs_from_text(full_text)
-            
-            # If no blocks found, return sample data
-            if not blocks:
-                blocks = [
-                    {
-                        'id': str(uuid4()),
-                        'company': 'Could not parse company name',
-                        'title': 'Please review and edit manually',
-                        'location': 'Location not found',
-                        'dateRange': 'Date range not found',
-                        'bullets': [
-                            {
-                                'id': str(uuid4()),
-                                'text': 'PDF parsing failed. Please enter your experience manually.'
-                            }
-                        ]
-                    }
-                ]
-            
-            return {'blocks': blocks}
+        blocks = []
+        for event in iter_parse_events(source, stop_after_experience, page_workers, backend):
+            if event['type'] == 'block':
+                blocks.append(event['block'])
+            elif event['type'] == 'summary' and stats is not None:
+                stats['backend'] = event['backend']
+                stats['attempts'] = event['attempts']
+        
+        return {'blocks': blocks}
             
     except Exception as e:
         print(f"Error parsing PDF: {str(e)}")
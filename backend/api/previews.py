@@ -0,0 +1,234 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, Optional, Set, Tuple
+
+from cache import LRUCache
+from metrics import stage
+
+# Image formats a page can be rendered to, with their media types
+FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+
+MIN_WIDTH = 32
+MAX_WIDTH = 2000
+
+# Size of the first-page thumbnail rendered ahead of time after a parse or export
+THUMBNAIL_WIDTH = 200
+THUMBNAIL_FORMAT = 'png'
+
+
+class PageNotFoundError(Exception):
+    """Raised for a page number outside the document."""
+
+
+def _init_worker() -> None:
+    """Preload pdfium and Pillow so the first render in each worker is not slower."""
+    import pypdfium2  # noqa: F401
+    from PIL import Image  # noqa: F401
+
+
+def _render_page(content: bytes, page_number: int, width: int, image_format: str) -> Optional[bytes]:
+    """
+    Rasterize one page (0-based) to fit width pixels; runs in a worker process.
+
+    Returns:
+        The encoded image, or None if the page does not exist
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(content)
+    try:
+        if not 0 <= page_number < len(pdf):
+            return None
+        page = pdf[page_number]
+        try:
+            bitmap = page.render(scale=width / page.get_width())
+            try:
+                image = bitmap.to_pil()
+            finally:
+                bitmap.close()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+    output = BytesIO()
+    image.save(output, format=image_format.upper())
+    return output.getvalue()
+
+
+class PreviewRenderer:
+    """
+    Renders page images of recently parsed or exported PDFs.
+
+    PDFs are kept by document id (the SHA-256 of their content) so pages
+    can be requested after the upload or export request has finished.
+    Rendered images are cached by document, page, width and format, and
+    rendering runs in a pool of worker processes, since PDFium is neither
+    thread-safe nor light on the event loop. Concurrent requests for the
+    same image share one render.
+
+    Args:
+        documents: Cache of PDF bytes by document id
+        images: Cache of rendered images
+        workers: Number of render worker processes
+    """
+
+    def __init__(self, documents: LRUCache, images: LRUCache, workers: int = 2):
+        self.documents = documents
+        self.images = images
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.pregenerated = 0
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def shutdown(self) -> None:
+        for task in self._background:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def warm_up(self, content: bytes, width: int = 600) -> None:
+        """Start the worker processes and render content's first page once per worker, bypassing the caches."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _render_page, content, 0, width, 'png') for _ in range(self.workers)
+        ))
+
+    def add_document(self, document_id: str, content: bytes) -> None:
+        """Keep a PDF so its pages can be previewed."""
+        self.documents.put(document_id, content)
+
+    @staticmethod
+    def _key(document_id: str, page: int, width: int, image_format: str) -> str:
+        return f"{document_id}:{page}:{width}:{image_format}"
+
+    async def render(self, document_id: str, page: int, width: int, image_format: str) -> Optional[bytes]:
+        """
+        Return a page (1-based) as an image, width pixels wide.
+
+        Returns:
+            The image, or None if the document is unknown
+
+        Raises:
+            PageNotFoundError: If the document has no such page
+        """
+        key = self._key(document_id, page, width, image_format)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        content = self.documents.get(document_id)
+        if content is None:
+            return None
+
+        self.misses += 1
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            with stage('render'):
+                image = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _render_page, content, page - 1, width, image_format
+                )
+            if image is None:
+                raise PageNotFoundError(f"Document has no page {page}")
+            self.images.put(key, image)
+            future.set_result(image)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self.shutdown()
+            future.set_exception(e)
+            # Retrieve the exception so it is not reported as unhandled
+            # when nobody else was waiting on this image.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        return image
+
+    def pregenerate(self, document_id: str, content: Optional[bytes] = None) -> None:
+        """
+        Keep a document (if content is given) and render its first-page
+        thumbnail in the background, so it is cached before the client asks.
+        """
+        if content is not None:
+            self.add_document(document_id, content)
+
+        async def run() -> None:
+            try:
+                await self.render(document_id, 1, THUMBNAIL_WIDTH, THUMBNAIL_FORMAT)
+                self.pregenerated += 1
+            except Exception as e:
+                print(f"Error pregenerating preview: {str(e)}")
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'pregenerated': self.pregenerated,
+            'documents': len(self.documents),
+            'documentBytes': self.documents.total_bytes,
+            'images': len(self.images),
+            'imageBytes': self.images.total_bytes,
+            'evictions': self.images.evictions,
+        }
+
+
+def parse_preview_options(width: int, image_format: str) -> Tuple[int, str]:
+    """
+    Validate a requested width and format.
+
+    Raises:
+        ValueError: If either is not supported
+    """
+    if not MIN_WIDTH <= width <= MAX_WIDTH:
+        raise ValueError(f"width must be between {MIN_WIDTH} and {MAX_WIDTH}")
+    image_format = image_format.lower()
+    if image_format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    return width, image_format
+
+
+def create_preview_renderer() -> PreviewRenderer:
+    """Build the preview renderer from PREVIEW_* environment variables."""
+    max_age = float(os.environ.get('PREVIEW_CACHE_TTL', 60 * 60))
+    return PreviewRenderer(
+        documents=LRUCache(
+            max_entries=int(os.environ.get('PREVIEW_DOCUMENTS', 64)),
+            max_bytes=int(os.environ.get('PREVIEW_DOCUMENT_MAX_BYTES', 128 * 1024 * 1024)),
+            max_age=max_age,
+        ),
+        images=LRUCache(
+            max_entries=int(os.environ.get('PREVIEW_CACHE_ENTRIES', 1024)),
+            max_bytes=int(os.environ.get('PREVIEW_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+            max_age=max_age,
+        ),
+        workers=int(os.environ.get('PREVIEW_WORKERS', 2)),
+    )
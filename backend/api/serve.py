@@ -0,0 +1,252 @@
+"""
+Serve the API from several pre-warmed worker processes.
+
+Usage:
+    python serve.py [--host 0.0.0.0] [--port 5001] [--workers 2] [--warmup blocking]
+
+The supervisor preloads the heavy modules (timing each one) and imports the
+app once. With --warmup blocking it also exports and parses a built-in
+sample resume before the socket is opened. It then forks the workers, which
+share the socket and inherit all of that. Each worker warms its own parse,
+export and preview process pools and only then accepts connections
+(blocking), or accepts them at once and warms up alongside them
+(background; GET /api/ready answers 503 until it is done). With --warmup off,
+workers serve as soon as the app has started. A worker that exits
+unexpectedly is replaced by a new fork.
+
+With several workers, the bullet index is owned by one more process, which
+the workers send their indexing, searches and near-duplicate lookups to, so
+every worker sees the same index (kept in BULLET_INDEX_PATH, if set).
+
+Multiple workers need os.fork, which Windows lacks; there one worker is run.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# uvicorn's exit code when the app fails to start
+STARTUP_FAILURE = 3
+
+
+def serve(config: Any, sockets: Optional[List[socket.socket]] = None) -> int:
+    """
+    Run the app with uvicorn in this process until it is told to stop.
+
+    Returns:
+        Exit code: 0, or STARTUP_FAILURE if the app failed to start
+    """
+    import uvicorn
+
+    # uvicorn handles these signals while it runs and raises them again once
+    # it has shut down, which must not end the process before its parse,
+    # export and preview pool processes have exited
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    server = uvicorn.Server(config)
+    server.run(sockets=sockets)
+    for child in multiprocessing.active_children():
+        child.join(timeout=5)
+    return 0 if server.started else STARTUP_FAILURE
+
+
+class Supervisor:
+    """
+    Forks workers that serve one listening socket, and the process that owns
+    their shared bullet index, and replaces any of them that exit while the
+    server is running.
+
+    Args:
+        config: uvicorn config of the (already imported) app
+        workers: Number of worker processes
+    """
+
+    def __init__(self, config: Any, workers: int):
+        self.config = config
+        self.workers = workers
+        self.socket = config.bind_socket()
+        self.children: Dict[int, int] = {}
+        self.index_pid: Optional[int] = None
+        self.index_dir = tempfile.mkdtemp(prefix='resublocks_')
+        self.index_address = os.path.join(self.index_dir, 'bullet_index.sock')
+        self.index_authkey = os.urandom(32)
+        self.stopping = False
+        self.exit_code = 0
+
+    def _fork(self, child: Callable[[], None]) -> int:
+        """Fork a process in its own process group that runs child, then exits."""
+        pid = os.fork()
+        if pid:
+            return pid
+
+        code = 1
+        try:
+            # A process group per child, so the supervisor can clean up a
+            # worker's pool processes if it dies, and terminal signals reach
+            # only the supervisor
+            os.setpgid(0, 0)
+            code = child() or 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+    def spawn(self, worker: int, replacement: bool = False) -> None:
+        def child() -> int:
+            if replacement:
+                from warmup import STARTUP
+
+                # A replacement's startup counts from its fork
+                STARTUP.started = time.perf_counter()
+            self.setup_worker(worker)
+            return serve(self.config, [self.socket])
+
+        self.children[self._fork(child)] = worker
+
+    def setup_worker(self, worker: int) -> None:
+        """Point a new worker at state shared with the other workers."""
+        import main as api
+        from bullet_index import RemoteBulletIndex
+
+        api.bullet_index = RemoteBulletIndex(self.index_address, self.index_authkey)
+
+    def spawn_index(self) -> None:
+        def child() -> None:
+            from bullet_index import create_bullet_index, serve_bullet_index
+
+            def stop(*_: Any) -> None:
+                signal.signal(signal.SIGTERM, signal.SIG_IGN)
+                raise KeyboardInterrupt
+
+            # The supervisor stops the owner once the workers have exited;
+            # SIGTERM then ends serve_bullet_index, which saves the index
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, stop)
+            try:
+                # Opened here rather than inherited, so a replacement owner
+                # maps the index file as its predecessor last saved it
+                serve_bullet_index(create_bullet_index(), self.index_address, self.index_authkey)
+            except KeyboardInterrupt:
+                pass
+
+        if os.path.exists(self.index_address):
+            os.unlink(self.index_address)
+        self.index_pid = self._fork(child)
+        # Workers' first calls need the owner to be listening
+        deadline = time.monotonic() + 10
+        while not os.path.exists(self.index_address) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stop(self, *_: Any) -> None:
+        # A second signal kills workers that are slow to shut down
+        sig = signal.SIGKILL if self.stopping else signal.SIGTERM
+        self.stopping = True
+        pids = list(self.children)
+        if sig == signal.SIGKILL and self.index_pid:
+            pids.append(self.index_pid)
+        for pid in pids:
+            try:
+                if sig == signal.SIGKILL:
+                    os.killpg(pid, sig)
+                else:
+                    os.kill(pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def stop_index(self) -> None:
+        """Stop the index owner (which saves the index) once no worker uses it."""
+        if self.index_pid is not None:
+            try:
+                os.kill(self.index_pid, signal.SIGTERM)
+                os.waitpid(self.index_pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.index_pid = None
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+
+    def run(self) -> int:
+        self.spawn_index()
+        for worker in range(self.workers):
+            self.spawn(worker)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            code = os.waitstatus_to_exitcode(status)
+            if pid == self.index_pid:
+                self.index_pid = None
+                if not self.stopping:
+                    print(f"Bullet index process (pid {pid}) exited with code {code}; starting a new one")
+                    self.spawn_index()
+                continue
+            worker = self.children.pop(pid, None)
+            if worker is None:
+                continue
+            # Pool processes a crashed worker left behind
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            if self.stopping:
+                continue
+            if code == STARTUP_FAILURE:
+                print(f"Worker {worker} failed to start; stopping")
+                self.exit_code = code
+                self.stop()
+                continue
+            print(f"Worker {worker} (pid {pid}) exited with code {code}; starting a new one")
+            self.spawn(worker, replacement=True)
+        self.stop_index()
+        return self.exit_code
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5001)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 1)))
+    parser.add_argument(
+        '--warmup', choices=('blocking', 'background', 'off'), default=os.environ.get('WARMUP', 'blocking'),
+        help='Warm-up before (blocking) or while (background) accepting connections, or none',
+    )
+    args = parser.parse_args()
+
+    workers = args.workers
+    if workers > 1 and not hasattr(os, 'fork'):
+        print("Multiple workers need os.fork, which this platform lacks; running one worker")
+        workers = 1
+
+    # Read by warmup.py, in this process and every worker
+    os.environ['WARMUP'] = args.warmup
+    from warmup import STARTUP, prime
+
+    STARTUP.preload()
+    with STARTUP.importing('app'):
+        import main as api
+    import uvicorn
+
+    if args.warmup == 'blocking':
+        prime(api.layout_cache)
+    print(f"Startup profile: {STARTUP.summary()}")
+
+    config = uvicorn.Config(api.app, host=args.host, port=args.port)
+    if workers == 1:
+        return serve(config)
+    return Supervisor(config, workers).run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
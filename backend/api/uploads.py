@@ -0,0 +1,212 @@
+import hashlib
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Union
+
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from metrics import stage
+
+# Largest PDF accepted by the single-file parse endpoints
+MAX_UPLOAD_BYTES = int(os.environ.get('PARSE_MAX_UPLOAD_BYTES', 20 * 1024 * 1024))
+
+# Uploads up to this size stay in memory; larger ones are spooled to disk
+SPOOL_BYTES = int(os.environ.get('PARSE_SPOOL_BYTES', 4 * 1024 * 1024))
+
+# Room in the request body for the multipart framing and any small form
+# fields around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised while reading an upload once it exceeds the size cap."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File is larger than {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class InvalidUploadError(ValueError):
+    """Raised when a request body is not a multipart form with the expected file."""
+
+
+class ReceivedUpload:
+    """
+    An uploaded PDF read in chunks: kept in memory while small, written to a
+    temporary file once it grows past the spool threshold. The SHA-256 of
+    the content is computed while reading, for the parse cache key.
+    """
+
+    def __init__(self):
+        self.filename = ''
+        self.size = 0
+        self.path: Optional[str] = None
+        self._chunks: List[bytes] = []
+        self._content: Optional[bytes] = None
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """The PDF as bytes (small uploads) or a file path (spooled uploads)."""
+        if self.path is not None:
+            return self.path
+        return self._content
+
+    def _write(self, chunk: bytes, spool_bytes: int) -> None:
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > spool_bytes:
+            self._file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+            self.path = self._file.name
+            for buffered in self._chunks:
+                self._file.write(buffered)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def _finish(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self.path is None:
+            # Join once, so every use of source shares one copy
+            self._content = b''.join(self._chunks)
+            self._chunks = []
+
+    def close(self) -> None:
+        """Release the content and delete the spool file, if any."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._chunks = []
+        self._content = None
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+class _FormReader:
+    """python-multipart callbacks that keep the data of the first file sent in one field."""
+
+    def __init__(self, field: str):
+        self.field = field.encode('utf-8')
+        self.filename: Optional[str] = None
+        # File data parsed since the caller last took it
+        self.chunks: List[bytes] = []
+        self._header_name = b''
+        self._header_value = b''
+        self._disposition = b''
+        self._in_file = False
+
+    def callbacks(self) -> Dict[str, Callable[..., None]]:
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+            'on_part_data': self.on_part_data,
+            'on_part_end': self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b''
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b'content-disposition':
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b''
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._in_file = (
+            self.filename is None and options.get(b'name') == self.field and b'filename' in options
+        )
+        if self._in_file:
+            self.filename = options[b'filename'].decode('utf-8', 'replace')
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.chunks.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+
+async def receive_upload(
+    request: Request,
+    field: str = 'file',
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    spool_bytes: int = SPOOL_BYTES,
+) -> ReceivedUpload:
+    """
+    Read the file sent in a multipart/form-data field straight from the
+    request body as it arrives, so the upload is held once (see
+    ReceivedUpload) and max_bytes is enforced as it is read, whether or
+    not the request declares a Content-Length.
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_bytes of the file
+            (or of the body around it) have been read
+        InvalidUploadError: The body is not multipart form data or has no
+            file in field
+    """
+    content_type, params = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in params:
+        raise InvalidUploadError("Expected a multipart/form-data upload")
+    max_body_bytes = max_bytes + FORM_OVERHEAD_BYTES
+    declared = request.headers.get('content-length', '')
+    if declared.isdigit() and int(declared) > max_body_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    form = _FormReader(field)
+    parser = MultipartParser(params[b'boundary'], form.callbacks())
+    received = ReceivedUpload()
+    body_bytes = 0
+    try:
+        async for body in request.stream():
+            body_bytes += len(body)
+            if body_bytes > max_body_bytes:
+                raise UploadTooLargeError(max_bytes)
+            try:
+                parser.write(body)
+            except ValueError as e:
+                raise InvalidUploadError(f"Malformed multipart upload: {str(e)}")
+            if not form.chunks:
+                continue
+            chunk = b''.join(form.chunks)
+            form.chunks = []
+            if received.size + len(chunk) > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            if received.path is None and received.size + len(chunk) <= spool_bytes:
+                received._write(chunk, spool_bytes)
+            else:
+                with stage('spool'):
+                    await run_in_threadpool(received._write, chunk, spool_bytes)
+        parser.finalize()
+        if form.filename is None:
+            raise InvalidUploadError(f"No file uploaded in the '{field}' field")
+        received.filename = form.filename
+        received._finish()
+    except BaseException:
+        received.close()
+        raise
+    return received
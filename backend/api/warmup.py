@@ -0,0 +1,191 @@
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# How a server process warms up (see serve.py):
+#   blocking    warm up before accepting connections
+#   background  accept connections at once and warm up alongside them,
+#               with /api/ready answering 503 until warm-up has finished
+#   off         no warm-up; ready as soon as the app has started
+WARMUP_MODES = ('blocking', 'background', 'off')
+WARMUP = os.environ.get('WARMUP', 'off').lower()
+if WARMUP not in WARMUP_MODES:
+    raise ValueError(f"WARMUP must be one of: {', '.join(WARMUP_MODES)}")
+
+# Third-party modules behind the first parse, export and analysis, in the
+# order they are preloaded
+HEAVY_MODULES = (
+    'fastapi',
+    'pypdfium2',
+    'pdfminer.pdfinterp',
+    'pdfplumber',
+    'reportlab.platypus',
+    'PIL.Image',
+    'anthropic',
+)
+
+# Built-in resume exported and parsed during warm-up (see prime)
+SAMPLE_RESUME: Dict[str, Any] = {'blocks': [
+    {
+        'id': 'sample-block-1',
+        'company': 'NORTHWIND TRADERS',
+        'title': 'Senior Software Engineer',
+        'location': 'Toronto, ON',
+        'dateRange': 'Jan 2021 - Present',
+        'bullets': [
+            {'id': 'sample-bullet-1', 'text': 'Built an event pipeline processing 40M orders a day with 99.99% uptime'},
+            {'id': 'sample-bullet-2', 'text': 'Cut p95 checkout latency by 45% by caching inventory lookups'},
+            {'id': 'sample-bullet-3', 'text': 'Mentored 4 engineers and led the migration to Kubernetes'},
+        ],
+    },
+    {
+        'id': 'sample-block-2',
+        'company': 'CONTOSO LTD',
+        'title': 'Software Engineer',
+        'location': 'Waterloo, ON',
+        'dateRange': 'May 2018 - Dec 2020',
+        'bullets': [
+            {'id': 'sample-bullet-4', 'text': 'Designed React dashboards used by 300 sales staff'},
+            {'id': 'sample-bullet-5', 'text': 'Automated weekly reporting, saving 10 hours of manual work a week'},
+        ],
+    },
+]}
+
+
+class StartupProfile:
+    """
+    Where a server process's startup time went: module imports, then
+    warm-up steps, in seconds, and how long it took to become ready.
+    Times run from when this module was first imported; a worker forked
+    by serve.py inherits its parent's profile and adds its own steps.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.warmup: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.ready_seconds: Optional[float] = None
+        self.sample_pdf: Optional[bytes] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_seconds is not None
+
+    @contextmanager
+    def importing(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.imports[name] = time.perf_counter() - started
+
+    def preload(self, modules: Iterable[str] = HEAVY_MODULES) -> None:
+        """
+        Import modules one by one, timing each. A module's time leaves out
+        dependencies an earlier module already imported.
+        """
+        for name in modules:
+            if name not in sys.modules:
+                with self.importing(name):
+                    importlib.import_module(name)
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time a warm-up step. A failing step is logged and recorded, and warm-up goes on."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            print(f"Error warming up {name}: {str(e)}")
+            self.errors[name] = str(e)
+        finally:
+            self.warmup[name] = time.perf_counter() - started
+
+    def mark_ready(self) -> None:
+        self.ready_seconds = time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        """One line of the profile for the server log."""
+        parts = []
+        for label, steps in (('imports', self.imports), ('warm-up', self.warmup)):
+            detail = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in steps.items())
+            parts.append(f"{label} {sum(steps.values()):.2f}s ({detail or 'none'})")
+        if self.ready:
+            parts.append(f"ready after {self.ready_seconds:.2f}s")
+        return '; '.join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'mode': WARMUP,
+            'ready': self.ready,
+            'readySeconds': round(self.ready_seconds, 4) if self.ready else None,
+            'importSeconds': round(sum(self.imports.values()), 4),
+            'imports': {name: round(seconds, 4) for name, seconds in self.imports.items()},
+            'warmupSeconds': round(sum(self.warmup.values()), 4),
+            'warmup': {name: round(seconds, 4) for name, seconds in self.warmup.items()},
+            'errors': self.errors,
+        }
+
+
+# Startup profile of this process
+STARTUP = StartupProfile()
+
+
+def sample_upload() -> bytes:
+    """
+    The sample resume as an uploaded PDF would usually have it: one field
+    per line under a "Work Experience" heading, which the parser reads in
+    full (export PDFs put location and date on one line).
+    """
+    from reportlab.platypus import Paragraph
+
+    from export import STYLES, build_pdf
+
+    elements = [Paragraph('Work Experience', STYLES['company'])]
+    for block in SAMPLE_RESUME['blocks']:
+        elements.append(Paragraph(block['company'], STYLES['company']))
+        elements.append(Paragraph(block['dateRange'], STYLES['meta']))
+        elements.append(Paragraph(block['location'], STYLES['meta']))
+        elements.append(Paragraph(block['title'], STYLES['job_title']))
+        elements.extend(Paragraph(f"• {bullet['text']}", STYLES['bullet']) for bullet in block['bullets'])
+    return build_pdf(elements)
+
+
+def prime(layout_cache: Any) -> Optional[bytes]:
+    """
+    Export the sample resume (plain and incremental) and parse it with
+    every extraction backend in this process, so one-time setup (styles,
+    fonts, extractor state) is done before the first request and worker
+    processes forked afterwards start with it done too. Runs once per
+    process tree; later calls return the first call's PDF.
+
+    Returns:
+        The sample upload PDF, or None if it could not be rendered
+    """
+    if STARTUP.sample_pdf is not None:
+        return STARTUP.sample_pdf
+
+    from export import render_resume_pdf
+    from extractors import EXTRACTORS
+    from parse import parse_resume
+
+    with STARTUP.step('export'):
+        render_resume_pdf(SAMPLE_RESUME)
+    with STARTUP.step('incrementalExport'):
+        layout_cache.render(SAMPLE_RESUME)
+    pdf = None
+    with STARTUP.step('sampleUpload'):
+        pdf = sample_upload()
+    if pdf is not None:
+        for backend in EXTRACTORS:
+            with STARTUP.step(f'parse:{backend}'):
+                blocks = parse_resume(pdf, backend=backend)['blocks']
+                if len(blocks) != len(SAMPLE_RESUME['blocks']):
+                    raise ValueError(f"sample resume parsed into {len(blocks)} blocks")
+    STARTUP.sample_pdf = pdf
+    return pdf
@@ -0,0 +1,207 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+from metrics import stage
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding and decoding when installed
+    orjson = None
+
+JSON_MEDIA_TYPE = 'application/json'
+
+# Resume payloads with repeated strings stored once and blocks and bullets
+# as arrays. Still JSON, so browsers decode it with JSON.parse:
+#   {"wire": 1, "strings": ["ACME", ...],
+#    "data": {..., "blocks": [[id, company, title, location, dateRange,
+#                              [[bulletId, text], ...]], ...]}}
+# where company, title, location and dateRange index into "strings".
+COMPACT_MEDIA_TYPE = 'application/vnd.resublocks.compact+json'
+WIRE_VERSION = 1
+
+BLOCK_KEYS = frozenset(('id', 'company', 'title', 'location', 'dateRange', 'bullets'))
+BULLET_KEYS = frozenset(('id', 'text'))
+INTERNED_FIELDS = ('company', 'title', 'location', 'dateRange')
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON as compact UTF-8, the way JSONResponse does."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _compact_block(block: Any, table: Dict[str, int]) -> Any:
+    # Anything that does not have exactly the block and bullet fields is
+    # kept as an object, so encoding never loses data
+    if not isinstance(block, dict) or block.keys() != BLOCK_KEYS:
+        return block
+    bullets = block['bullets']
+    if not isinstance(bullets, list) or not all(
+        isinstance(bullet, dict) and bullet.keys() == BULLET_KEYS for bullet in bullets
+    ):
+        return block
+    if not all(isinstance(block[field], str) for field in INTERNED_FIELDS):
+        return block
+
+    record: List[Any] = [block['id']]
+    for field in INTERNED_FIELDS:
+        record.append(table.setdefault(block[field], len(table)))
+    record.append([[bullet['id'], bullet['text']] for bullet in bullets])
+    return record
+
+
+def _compact(value: Any, table: Dict[str, int]) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: [_compact_block(block, table) for block in item]
+            if key == 'blocks' and isinstance(item, list) else _compact(item, table)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_compact(item, table) for item in value]
+    return value
+
+
+def _expand_block(record: Any, strings: List[str]) -> Any:
+    if not isinstance(record, list):
+        return record
+    block_id, company, title, location, date_range, bullets = record
+    return {
+        'id': block_id,
+        'company': strings[company],
+        'title': strings[title],
+        'location': strings[location],
+        'dateRange': strings[date_range],
+        'bullets': [{'id': bullet_id, 'text': text} for bullet_id, text in bullets],
+    }
+
+
+def _expand(value: Any, strings: List[str]) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: [_expand_block(block, strings) for block in item]
+            if key == 'blocks' and isinstance(item, list) else _expand(item, strings)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_expand(item, strings) for item in value]
+    return value
+
+
+def encode_compact(content: Any) -> Dict[str, Any]:
+    """Wrap a payload in the compact envelope, turning every "blocks" list into records."""
+    table: Dict[str, int] = {}
+    data = _compact(content, table)
+    return {'wire': WIRE_VERSION, 'strings': list(table), 'data': data}
+
+
+def decode_compact(envelope: Any) -> Any:
+    """
+    Unwrap a compact envelope back into the plain JSON payload.
+
+    Raises:
+        ValueError: If the envelope is malformed or from another wire version
+    """
+    if not isinstance(envelope, dict) or envelope.get('wire') != WIRE_VERSION:
+        raise ValueError(f"Expected a compact payload with wire version {WIRE_VERSION}")
+    try:
+        return _expand(envelope['data'], envelope['strings'])
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"Malformed compact payload: {str(e)}")
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or '').split(';', 1)[0].strip().lower()
+
+
+def accepts_compact(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for the compact format (with a non-zero q)."""
+    for media_range in (accept or '').split(','):
+        media_type, _, params = media_range.partition(';')
+        if media_type.strip().lower() != COMPACT_MEDIA_TYPE:
+            continue
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def encode_for(request: Request, content: Any) -> bytes:
+    """Encode content in the format the request accepts."""
+    if accepts_compact(request.headers.get('accept')):
+        content = encode_compact(content)
+    return dumps(content)
+
+
+def wire_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Respond with data the server produced itself (parse results, jobs,
+    layouts), in the compact format if the client accepts it and JSON
+    otherwise.
+
+    Returning a Response directly skips FastAPI's jsonable_encoder pass,
+    which would otherwise walk and copy the whole payload even though it
+    is already plain JSON types.
+    """
+    compact = accepts_compact(request.headers.get('accept'))
+    with stage('serialize'):
+        body = dumps(encode_compact(content) if compact else content)
+    response = Response(
+        body,
+        status_code=status_code,
+        headers=headers,
+        media_type=COMPACT_MEDIA_TYPE if compact else JSON_MEDIA_TYPE,
+    )
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+class WireRequest(Request):
+    """Request whose JSON body may also be sent in the compact format."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, '_json'):
+            body = await self.body()
+            with stage('decode'):
+                content = loads(body)
+                if _media_type(self.headers.get('content-type')) == COMPACT_MEDIA_TYPE:
+                    content = decode_compact(content)
+            self._json = content
+        return self._json
+
+
+class WireRoute(APIRoute):
+    """
+    Route that reads compact request bodies (Content-Type
+    application/vnd.resublocks.compact+json) as if they were plain JSON,
+    so endpoints validate them with the same pydantic models.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(WireRequest(request.scope, request.receive))
+
+        return route_handler
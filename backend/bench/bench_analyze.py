@@ -0,0 +1,125 @@
+"""
+Component analysis against the local Anthropic stub: one call per component
+vs pooled concurrent calls vs batched calls vs the cache.
+
+Usage:
+    python bench/bench_analyze.py [--blocks 5] [--latency 0.3] [--error-rate 0.1]
+
+Analyzes every block and bullet of a synthetic resume with
+bench/stub_anthropic.py serving the model on a local port, and prints wall
+time and model calls for each strategy. With --error-rate the stub fails
+that share of requests and retries, errors and partial results are
+reported too. Exits non-zero if any successful analysis differs from what
+the stub returned for that component.
+"""
+import argparse
+import asyncio
+import copy
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api'))
+
+from analyze import ComponentAnalyzer, _normalize  # noqa: E402
+from bench_export import make_resume  # noqa: E402
+from cache import LRUCache  # noqa: E402
+from stub_anthropic import expected_result, serve_in_thread  # noqa: E402
+
+
+def resume_components(blocks: int):
+    components = []
+    for block in make_resume(blocks)['blocks']:
+        components.append(block)
+        for bullet in block['bullets']:
+            bullet = copy.deepcopy(bullet)
+            bullet['text'] = f"{bullet['text']} ({bullet['id']})"
+            components.append(bullet)
+    return components
+
+
+def analyzer(args, base_url: str, **options) -> ComponentAnalyzer:
+    settings = dict(max_concurrency=args.concurrency, batch_size=args.batch_size, max_retries=args.retries)
+    settings.update(options)
+    return ComponentAnalyzer(LRUCache(max_entries=10000), base_url=base_url, **settings)
+
+
+def check(components, results) -> int:
+    """Number of successful results that differ from the stub's analysis."""
+    return sum(
+        1 for component, result in zip(components, results)
+        if 'error' not in result and result != expected_result(_normalize(component))
+    )
+
+
+async def run(args) -> int:
+    os.environ.setdefault('ANTHROPIC_API_KEY', 'stub')
+    server = serve_in_thread(
+        args.port, latency=args.latency, jitter=0.0,
+        error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    components = resume_components(args.blocks)
+    print(f"{len(components)} components, {args.latency:.2f}s model latency, "
+          f"{args.error_rate:.0%} errors, {args.malformed_rate:.0%} malformed replies")
+    print(f"{'strategy':<14}{'seconds':>9}{'calls':>7}{'errors':>8}")
+
+    async def one_at_a_time(a: ComponentAnalyzer):
+        return [(await a.analyze_many([c]))[0] for c in components]
+
+    async def concurrent(a: ComponentAnalyzer):
+        return list(await asyncio.gather(*(a.analyze_many([c]) for c in components)))
+
+    strategies = [
+        ('sequential', analyzer(args, base_url, max_concurrency=1, batch_size=1), one_at_a_time),
+        ('concurrent', analyzer(args, base_url, batch_size=1), concurrent),
+        ('batched', analyzer(args, base_url), lambda a: a.analyze_many(components)),
+    ]
+
+    mismatches = 0
+    batched = None
+    for name, a, strategy in strategies:
+        started = time.perf_counter()
+        results = await strategy(a)
+        elapsed = time.perf_counter() - started
+        if name == 'concurrent':
+            results = [r[0] for r in results]
+        mismatches += check(components, results)
+        errors = sum(1 for r in results if 'error' in r)
+        print(f"{name:<14}{elapsed:>9.2f}{a.calls:>7}{errors:>8}")
+        if name == 'batched':
+            batched = a
+        else:
+            await a.close()
+
+    calls = batched.calls
+    started = time.perf_counter()
+    results = await batched.analyze_many(components)
+    elapsed = time.perf_counter() - started
+    mismatches += check(components, results)
+    print(f"{'cached':<14}{elapsed:>9.2f}{batched.calls - calls:>7}{sum(1 for r in results if 'error' in r):>8}")
+    await batched.close()
+
+    server.should_exit = True
+    if mismatches:
+        print(f"{mismatches} analyses differ from the stub's")
+    return 1 if mismatches else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=5, help='Job blocks in the resume (each with 6 bullets)')
+    parser.add_argument('--latency', type=float, default=0.3, help='Stub seconds per model call')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of stub calls that fail')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Share of stub replies that are not JSON')
+    parser.add_argument('--concurrency', type=int, default=4, help='Model calls in flight')
+    parser.add_argument('--batch-size', type=int, default=20, help='Components per batched call')
+    parser.add_argument('--retries', type=int, default=2, help='Retries per failed call')
+    parser.add_argument('--port', type=int, default=8765)
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Bulk export throughput by number of export worker processes.
+
+Usage:
+    python bench/bench_bulk_export.py [--resumes 200] [--blocks 6] [--workers 1 2 4]
+
+Streams a bulk export of --resumes distinct resumes into memory once per
+worker count (after a warm-up export that starts the workers), checks
+that the ZIP opens and its manifest reports every resume, and prints
+throughput and speedup over the first worker count. Speedup can only
+grow with workers up to the number of CPU cores, which is printed too.
+Exits non-zero if an archive is incomplete.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api'))
+
+from bench_export import make_resume  # noqa: E402
+from bulk_export import ExportItem, ExportWorkerPool, entry_name, iter_bulk_export  # noqa: E402
+
+
+async def export_zip(pool: ExportWorkerPool, resumes) -> bytes:
+    used = set()
+    items = [ExportItem(entry_name(None, i, used), resume=resume) for i, resume in enumerate(resumes)]
+    chunks = []
+    async for chunk in iter_bulk_export(items, pool.render, pool.workers * 2):
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def check_archive(archive: bytes, expected: int) -> bool:
+    with zipfile.ZipFile(io.BytesIO(archive)) as z:
+        if z.testzip() is not None:
+            return False
+        manifest = json.loads(z.read('manifest.json'))
+        return manifest['succeeded'] == expected and len(z.namelist()) == expected + 1
+
+
+async def run(args) -> int:
+    resumes = []
+    for i in range(args.resumes):
+        resume = make_resume(args.blocks)
+        resume['blocks'][0]['company'] = f"ACME CORPORATION {i}"
+        resumes.append(resume)
+
+    print(f"{os.cpu_count()} CPU cores, {args.resumes} resumes of {args.blocks} blocks")
+    print(f"{'workers':>7}{'seconds':>10}{'files/s':>10}{'MB':>8}{'speedup':>9}")
+    failures = 0
+    baseline = None
+    for workers in args.workers:
+        pool = ExportWorkerPool(workers=workers)
+        pool.start()
+        try:
+            await export_zip(pool, resumes[:workers * 2])
+            started = time.perf_counter()
+            archive = await export_zip(pool, resumes)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.shutdown()
+
+        if not check_archive(archive, args.resumes):
+            failures += 1
+            print(f"{workers} workers: archive is incomplete")
+        baseline = baseline or elapsed
+        print(f"{workers:>7}{elapsed:>10.2f}{args.resumes / elapsed:>10.1f}"
+              f"{len(archive) / 1e6:>8.2f}{baseline / elapsed:>8.2f}x")
+
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resumes', type=int, default=200, help='Resumes per export')
+    parser.add_argument('--blocks', type=int, default=6, help='Job blocks per resume')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Bullet index build, search and near-duplicate lookup at scale.
+
+Usage:
+    python bench/bench_bullet_index.py [--bullets 1000000] [--queries 1000] [--path FILE]
+
+Generates --bullets synthetic bullets (an action verb plus words drawn from
+a Zipf-distributed 20,000-word vocabulary, 20 per resume) where 2% are
+near-copies of an earlier bullet with one word changed, and indexes them
+in resume-sized inserts with the index file flushed every --flush-every
+bullets. It then reopens the file through mmap, as a restarted server
+would, and times:
+
+  search  --queries keyword queries of 1-3 words taken from random bullets
+  dedup   near-duplicate lookups for the injected copies; recall is the
+          share of copies at least --threshold similar to their original
+          (by exact word-pair Jaccard) for which the original is found
+
+Exits non-zero if search p95 exceeds --max-search-ms or dedup recall is
+below --min-recall.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api'))
+
+from bullet_index import STOPWORDS, BulletIndex, jaccard, shingles, tokenize  # noqa: E402
+from jobs import percentile  # noqa: E402
+
+VERBS = [
+    'Built', 'Led', 'Designed', 'Developed', 'Improved', 'Automated', 'Migrated', 'Launched',
+    'Optimized', 'Reduced', 'Scaled', 'Created', 'Implemented', 'Managed', 'Shipped', 'Owned',
+]
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'pe', 'da', 'gri', 'sto', 'plex', 'tron', 'zen']
+BULLETS_PER_RESUME = 20
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words, list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(size)))
+
+
+def generate(count: int, rng: random.Random):
+    """Yield (text, original index or None) for count bullets."""
+    words, weights = vocabulary(20000, rng)
+    texts = []
+    for i in range(count):
+        if texts and rng.random() < 0.02:
+            original = rng.randrange(len(texts))
+            tokens = texts[original].split()
+            position = rng.randrange(1, len(tokens))
+            tokens[position] = rng.choices(words, cum_weights=weights)[0]
+            texts.append(' '.join(tokens))
+            yield texts[-1], original
+            continue
+        body = rng.choices(words, cum_weights=weights, k=rng.randint(6, 14))
+        metric = f" by {rng.randint(5, 95)}%" if rng.random() < 0.5 else ''
+        texts.append(f"{rng.choice(VERBS)} {' '.join(body)}{metric}")
+        yield texts[-1], None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bullets', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--flush-every', type=int, default=250_000)
+    parser.add_argument('--path', help='Index file to write (default: a temporary file)')
+    parser.add_argument('--max-search-ms', type=float, default=None, help='Fail if search p95 is above this')
+    parser.add_argument('--threshold', type=float, default=0.6, help='Near-duplicate similarity threshold')
+    parser.add_argument('--min-recall', type=float, default=0.9, help='Fail if dedup recall is below this')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = args.path or os.path.join(tempfile.mkdtemp(prefix='bullet_index_'), 'bullets.idx')
+    if os.path.exists(path):
+        os.unlink(path)
+
+    index = BulletIndex(path, flush_every=args.flush_every)
+    texts, copies, blocks = [], [], []
+    elapsed = 0.0
+
+    def insert(document_id: str) -> float:
+        t0 = time.perf_counter()
+        index.add_document(document_id, [{'bullets': blocks}])
+        return time.perf_counter() - t0
+
+    for i, (text, original) in enumerate(generate(args.bullets, rng)):
+        texts.append(text)
+        if original is not None:
+            copies.append((i, original))
+        blocks.append({'id': str(uuid.UUID(int=rng.getrandbits(128))), 'text': text})
+        if len(blocks) == BULLETS_PER_RESUME:
+            elapsed += insert(f"resume-{i // BULLETS_PER_RESUME}")
+            blocks = []
+    if blocks:
+        elapsed += insert('resume-last')
+
+    t0 = time.perf_counter()
+    index.save()
+    save_seconds = time.perf_counter() - t0
+    elapsed += save_seconds
+
+    t0 = time.perf_counter()
+    index = BulletIndex(path)
+    open_seconds = time.perf_counter() - t0
+    stats = index.stats()
+    print(f"{stats['bullets']} bullets indexed in {elapsed:.1f}s "
+          f"({stats['bullets'] / elapsed:,.0f}/s, final save {save_seconds:.1f}s); "
+          f"file {stats['fileBytes'] / 1e6:.0f} MB, reopened in {open_seconds * 1000:.0f} ms")
+
+    query_rng = random.Random(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        words = [t for t in tokenize(query_rng.choice(texts)) if t not in STOPWORDS and not t.isdigit()]
+        queries.append(' '.join(query_rng.sample(words, min(len(words), query_rng.randint(1, 3)))))
+
+    print(f"{'':<14}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}")
+    search_p95 = 0.0
+    for label in ('search (cold)', 'search (warm)'):
+        latencies = []
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search(query, 10)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        search_p95 = percentile(latencies, 95)
+        print(f"{label:<14}{percentile(latencies, 50):>8.2f}{search_p95:>8.2f}{percentile(latencies, 99):>8.2f}")
+
+    sample = query_rng.sample(copies, min(len(copies), args.queries))
+    latencies, similar, found = [], 0, 0
+    for copy, original in sample:
+        t0 = time.perf_counter()
+        duplicates = index.near_duplicates(texts[copy], args.threshold, k=10)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if jaccard(shingles(tokenize(texts[copy])), shingles(tokenize(texts[original]))) >= args.threshold:
+            similar += 1
+            found += any(d['text'] == texts[original] for d in duplicates)
+    recall = found / similar if similar else 1.0
+    print(f"{'dedup':<14}{percentile(latencies, 50):>8.2f}{percentile(latencies, 95):>8.2f}"
+          f"{percentile(latencies, 99):>8.2f}   recall {recall:.3f} ({similar} copies above threshold)")
+
+    failed = recall < args.min_recall
+    if args.max_search_ms is not None and search_p95 > args.max_search_ms:
+        failed = True
+    if not args.path:
+        os.unlink(path)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Cold start: time from launching the server to its first successful parse
+and export, per serving mode.
+
+Usage:
+    python bench/bench_cold_start.py [--workers 2] [--runs 3] [--modes uvicorn,off,blocking,background]
+
+Each run starts a fresh server process on a free port and, like a client
+hitting a new instance, sends a parse request as soon as a connection is
+accepted, then an export, then a second parse and export of other
+documents. Modes:
+
+  uvicorn     uvicorn main:app --workers N (how the app was served before)
+  off         api/serve.py --warmup off
+  blocking    api/serve.py --warmup blocking
+  background  api/serve.py --warmup background
+
+and for each one the medians over --runs of:
+
+  first parse/export  seconds from launch until the response came back
+  parse/export ms     latency of those first requests (including any wait
+                      for a worker to accept), then of the second ones
+
+The startup profile of the last blocking run (GET /api/ready) is printed
+too. Exits non-zero if a first parse does not return the resume's jobs.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, '..', 'api')
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, API_DIR)
+
+from jobs import percentile  # noqa: E402
+from pdf_corpus import DATE_FORMATS, generate_resume, render_stacked  # noqa: E402
+
+MODES = ('uvicorn', 'off', 'blocking', 'background')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def command(mode: str, port: int, workers: int):
+    if mode == 'uvicorn':
+        return [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+                '--port', str(port), '--workers', str(workers)]
+    return [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--warmup', mode]
+
+
+def with_ids(resume):
+    for block in resume['blocks']:
+        block['id'] = str(uuid.uuid4())
+        for bullet in block['bullets']:
+            bullet['id'] = str(uuid.uuid4())
+    return resume
+
+
+def documents(run: int, directory: str):
+    """Two (pdf bytes, job count, export payload) tuples, unique to this run."""
+    result = []
+    for i in range(2):
+        seed = 1000 * run + i
+        resume = generate_resume(seed, 3, DATE_FORMATS[seed % len(DATE_FORMATS)])
+        path = os.path.join(directory, f"{seed}.pdf")
+        render_stacked(resume, path, '•', jobs_per_page=3, extra_pages=0)
+        with open(path, 'rb') as f:
+            result.append((f.read(), len(resume['blocks']), with_ids(resume)))
+    return result
+
+
+def request(client: httpx.Client, started: float, method: str, url: str, **kwargs):
+    """Send a request, retrying until the server accepts connections; (response, seconds since launch, latency)."""
+    while True:
+        sent = time.perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+            break
+        except httpx.TransportError:
+            time.sleep(0.005)
+    done = time.perf_counter()
+    return response, done - started, done - sent
+
+
+def run_once(mode: str, workers: int, run: int, directory: str):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    docs = documents(run, directory)
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    env.pop('BULLET_INDEX_PATH', None)
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        command(mode, port, workers), cwd=API_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        timings = {}
+        ok = True
+        with httpx.Client(base_url=base, timeout=120) as client:
+            for label, (pdf, jobs, resume) in zip(('first', 'second'), docs):
+                response, at, latency = request(
+                    client, started, 'POST', '/api/parse-resume',
+                    files={'file': ('resume.pdf', pdf, 'application/pdf')},
+                )
+                parsed = response.status_code == 200 and len(response.json().get('blocks', [])) == jobs
+                ok = ok and (parsed or label == 'second')
+                timings[f'{label} parse'] = (at, latency)
+                response, at, latency = request(client, started, 'POST', '/api/export-resume', json=resume)
+                ok = ok and response.status_code == 200
+                timings[f'{label} export'] = (at, latency)
+            profile = None
+            if mode != 'uvicorn':
+                while True:
+                    response = client.get('/api/ready')
+                    if response.status_code == 200:
+                        profile = response.json()['startup']
+                        break
+                    time.sleep(0.05)
+        return timings, profile, ok
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+    parser.add_argument('--runs', type=int, default=3, help='Server starts per mode (medians are reported)')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes to run')
+    args = parser.parse_args()
+    modes = [mode for mode in args.modes.split(',') if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    directory = tempfile.mkdtemp(prefix='cold_start_')
+    print(f"{args.workers} workers, {args.runs} runs per mode, {os.cpu_count()} CPUs")
+    print(f"{'mode':<12}{'first parse s':>14}{'first export s':>15}"
+          f"{'parse ms':>10}{'2nd parse ms':>13}{'export ms':>11}{'2nd export ms':>14}")
+    failures = 0
+    last_profile = None
+    for mode in modes:
+        samples = {}
+        for run in range(args.runs):
+            timings, profile, ok = run_once(mode, args.workers, run, directory)
+            failures += not ok
+            for name, values in timings.items():
+                samples.setdefault(name, []).append(values)
+            if mode == 'blocking':
+                last_profile = profile
+
+        def median(name: str, index: int) -> float:
+            return percentile([values[index] for values in samples[name]], 50)
+
+        print(f"{mode:<12}{median('first parse', 0):>14.2f}{median('first export', 0):>15.2f}"
+              f"{median('first parse', 1) * 1000:>10.0f}{median('second parse', 1) * 1000:>13.0f}"
+              f"{median('first export', 1) * 1000:>11.0f}{median('second export', 1) * 1000:>14.0f}")
+
+    if last_profile:
+        print(f"\nStartup profile (blocking, pid {last_profile['pid']}): "
+              f"ready after {last_profile['readySeconds']:.2f}s")
+        for section in ('imports', 'warmup'):
+            print(f"  {section:<8}" + ', '.join(
+                f"{name} {seconds * 1000:.0f}ms" for name, seconds in last_profile[section].items()
+            ))
+    if failures:
+        print(f"{failures} runs did not parse or export successfully")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
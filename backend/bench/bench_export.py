@@ -0,0 +1,99 @@
+"""
+Export latency after a one-bullet edit: full render vs incremental vs layout only.
+
+Usage:
+    python bench/bench_export.py [--blocks 5 20 80] [--edits 20]
+
+For each resume size, renders once to warm the layout cache, then applies
+--edits single-bullet edits and times a full render_resume_pdf, an
+incremental LayoutCache.render and a layout-only LayoutCache.layout for
+each. Exits non-zero if an incremental PDF's text differs from the full
+render's.
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api'))
+
+from export import render_resume_pdf  # noqa: E402
+from jobs import percentile  # noqa: E402
+from layout import LayoutCache  # noqa: E402
+
+
+def make_resume(blocks: int, bullets: int = 6):
+    return {'blocks': [
+        {
+            'id': f"block-{i}",
+            'company': f"ACME CORPORATION {i}",
+            'title': 'Senior Software Engineer',
+            'location': 'Toronto, ON',
+            'dateRange': 'May 2015 - Aug 2016',
+            'bullets': [
+                {'id': f"bullet-{i}-{j}",
+                 'text': f"Built distributed system number {j} reducing latency across regions for customers"}
+                for j in range(bullets)
+            ],
+        }
+        for i in range(blocks)
+    ]}
+
+
+def pdf_text(pdf: bytes) -> str:
+    import pypdfium2 as pdfium
+
+    document = pdfium.PdfDocument(pdf)
+    try:
+        return '\f'.join(document[i].get_textpage().get_text_bounded() for i in range(len(document)))
+    finally:
+        document.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, nargs='+', default=[5, 20, 80], help='Resume sizes in job blocks')
+    parser.add_argument('--edits', type=int, default=20, help='Edits timed per size')
+    args = parser.parse_args()
+
+    mismatches = 0
+    print(f"{'blocks':>6}{'full ms':>10}{'incr ms':>10}{'layout ms':>11}{'speedup':>9}")
+    for size in args.blocks:
+        resume = make_resume(size)
+        cache = LayoutCache()
+        cache.render(resume)
+
+        full, incremental, layout_only = [], [], []
+        for edit in range(args.edits):
+            resume = copy.deepcopy(resume)
+            block = resume['blocks'][edit % size]
+            block['bullets'][0]['text'] = f"Edited bullet {edit} with a slightly different length of text"
+
+            t0 = time.perf_counter()
+            expected = render_resume_pdf(resume)
+            t1 = time.perf_counter()
+            actual = cache.render(resume)
+            t2 = time.perf_counter()
+            cache.layout(resume)
+            t3 = time.perf_counter()
+
+            full.append(t1 - t0)
+            incremental.append(t2 - t1)
+            layout_only.append(t3 - t2)
+            if edit == 0 and pdf_text(actual) != pdf_text(expected):
+                mismatches += 1
+                print(f"{size} blocks: incremental PDF text differs from a full render")
+
+        full_ms = percentile(full, 50) * 1000
+        incremental_ms = percentile(incremental, 50) * 1000
+        layout_ms = percentile(layout_only, 50) * 1000
+        print(f"{size:>6}{full_ms:>10.1f}{incremental_ms:>10.1f}{layout_ms:>11.1f}"
+              f"{full_ms / incremental_ms:>8.1f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
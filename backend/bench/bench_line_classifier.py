@@ -0,0 +1,87 @@
+"""
+Golden check and micro-benchmark for the line classifier in parse.py.
+
+Usage:
+    python bench/bench_line_classifier.py [--lines 200000] [--repeat 5]
+
+First verifies that extract_jobs_from_text still produces the expected
+blocks for every case in golden_jobs.json, then reports the per-line cost
+of extract_jobs_from_text on a large generated text dump.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api'))
+
+from parse import extract_jobs_from_text  # noqa: E402
+from text_corpus import generate_text  # noqa: E402
+
+
+def _without_ids(blocks):
+    return [
+        {
+            'company': block['company'],
+            'title': block['title'],
+            'location': block['location'],
+            'dateRange': block['dateRange'],
+            'bullets': [bullet['text'] for bullet in block['bullets']],
+        }
+        for block in blocks
+    ]
+
+
+def check_golden(path: str) -> int:
+    """Return the number of golden cases whose output changed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+
+    failures = 0
+    for i, case in enumerate(cases):
+        if _without_ids(extract_jobs_from_text(case['text'])) != case['blocks']:
+            failures += 1
+            print(f"  golden case {i}: output differs")
+    print(f"Golden corpus: {len(cases) - failures}/{len(cases)} cases identical")
+    return failures
+
+
+def benchmark(line_count: int, repeat: int) -> None:
+    parts = []
+    lines = 0
+    seed = 0
+    while lines < line_count:
+        text = generate_text(seed, jobs=20)
+        parts.append(text)
+        lines += text.count('\n')
+        seed += 1
+    dump = ''.join(parts)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        blocks = extract_jobs_from_text(dump)
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(f"Text dump: {lines} lines, {len(dump) / 1e6:.1f} MB, {len(blocks)} blocks")
+    print(f"extract_jobs_from_text: best {best * 1000:.1f} ms, "
+          f"{best / lines * 1e9:.0f} ns/line over {repeat} runs")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=200000, help='Approximate lines in the text dump')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs (best is reported)')
+    parser.add_argument('--golden', default=os.path.join(BENCH_DIR, 'golden_jobs.json'))
+    args = parser.parse_args()
+
+    failures = check_golden(args.golden)
+    benchmark(args.lines, args.repeat)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Peak-memory check for parse_resume on large synthetic PDFs.
+
+Usage:
+    python bench/bench_memory.py [--pages 100] [--max-growth-mb 32]
+
+Builds a small and a large synthetic resume PDF (one job with 40 bullets
+per page), parses each one from in-memory bytes in a fresh process per
+backend, and reports peak RSS. Exits non-zero if parsing the large PDF
+needs more than --max-growth-mb above the small one, i.e. if memory is no
+longer flat as the page count grows.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, '..', 'api')
+
+BACKENDS = ['pdfium', 'pdfplumber', 'pdfminer']
+
+# Run in a child process so each measurement starts from a clean heap
+MEASURE = '''
+import resource, sys
+sys.path.insert(0, sys.argv[1])
+from parse import parse_resume
+with open(sys.argv[2], 'rb') as f:
+    content = f.read()
+result = parse_resume(content, backend=sys.argv[3])
+assert 'error' not in result, result.get('error')
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in bytes on macOS and kilobytes on Linux
+print(peak if sys.platform == 'darwin' else peak * 1024)
+'''
+
+
+def build_pdf(path: str, pages: int) -> None:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+    styles = getSampleStyleSheet()
+    elements = [Paragraph("Work Experience", styles['Heading2'])]
+    for page in range(pages):
+        elements.append(Paragraph(f"ACME CORPORATION {page}", styles['Heading3']))
+        elements.append(Paragraph("May 2015 - Aug 2016", styles['Normal']))
+        elements.append(Paragraph("Toronto, ON", styles['Normal']))
+        elements.append(Paragraph("Senior Software Engineer", styles['Normal']))
+        for bullet in range(40):
+            elements.append(Paragraph(
+                f"• Built distributed system number {bullet} reducing latency across regions",
+                styles['Normal'],
+            ))
+        elements.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=letter).build(elements)
+
+
+def peak_rss(pdf_path: str, backend: str) -> int:
+    output = subprocess.check_output(
+        [sys.executable, '-c', MEASURE, API_DIR, pdf_path, backend], text=True
+    )
+    return int(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=100, help='Pages in the large PDF')
+    parser.add_argument('--small-pages', type=int, default=10, help='Pages in the small PDF')
+    parser.add_argument('--max-growth-mb', type=float, default=32.0,
+                        help='Allowed peak RSS growth from the small to the large PDF')
+    parser.add_argument('--backend', action='append', choices=BACKENDS,
+                        help='Backend(s) to measure (default: all)')
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        small = os.path.join(workdir, 'small.pdf')
+        large = os.path.join(workdir, 'large.pdf')
+        build_pdf(small, args.small_pages)
+        build_pdf(large, args.pages)
+
+        print(f"{'backend':<12}{args.small_pages:>6} pages{args.pages:>8} pages{'growth':>10}")
+        for backend in args.backend or BACKENDS:
+            small_peak = peak_rss(small, backend) / 2**20
+            large_peak = peak_rss(large, backend) / 2**20
+            growth = large_peak - small_peak
+            status = 'ok' if growth <= args.max_growth_mb else 'FAIL'
+            failures += status == 'FAIL'
+            print(f"{backend:<12}{small_peak:>9.1f} MB{large_peak:>10.1f} MB{growth:>7.1f} MB  {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Parse latency by PARSE_PAGE_WORKERS, run through the server's parse worker
+pool.
+
+Usage:
+    python bench/bench_page_workers.py [--pages 20] [--repeat 3] [--page-workers 1 2 4]
+
+Builds a synthetic multi-page resume PDF, then for each page worker count
+starts a fresh process that parses it --repeat times through
+jobs.ParseJobEngine (so page workers run inside a parse worker, as they
+do in the server), shuts the engine down and exits. Prints the median
+parse time and speedup over the first count, with the number of CPU
+cores. Exits non-zero if a count returns different blocks from the
+first one, or if its process has not exited --exit-timeout seconds
+after the engine was shut down (e.g. page workers left running).
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, '..', 'api')
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, API_DIR)
+
+from bench_memory import build_pdf  # noqa: E402
+from jobs import percentile  # noqa: E402
+
+# Run in a child process so every count starts its own pools and must exit
+MEASURE = '''
+import asyncio, json, sys, time
+sys.path.insert(0, sys.argv[1])
+from jobs import ParseJobEngine
+
+async def main():
+    with open(sys.argv[2], 'rb') as f:
+        content = f.read()
+    engine = ParseJobEngine(workers=1)
+    times = []
+    try:
+        for _ in range(int(sys.argv[4])):
+            started = time.perf_counter()
+            result = await engine.run(content, page_workers=int(sys.argv[3]))
+            times.append(time.perf_counter() - started)
+    finally:
+        engine.shutdown()
+    assert 'error' not in result, result.get('error')
+    blocks = [{k: v for k, v in block.items() if k != 'id'} for block in result['blocks']]
+    for block in blocks:
+        block['bullets'] = [bullet['text'] for bullet in block['bullets']]
+    print(json.dumps({'times': times, 'blocks': blocks}), flush=True)
+
+asyncio.run(main())
+'''
+
+
+def measure(pdf_path: str, page_workers: int, repeat: int, exit_timeout: float):
+    """(parse times, blocks, exited) for one page worker count."""
+    child = subprocess.Popen(
+        [sys.executable, '-c', MEASURE, API_DIR, pdf_path, str(page_workers), str(repeat)],
+        stdout=subprocess.PIPE, text=True, start_new_session=True,
+    )
+    line = child.stdout.readline()
+    try:
+        child.wait(timeout=exit_timeout)
+        exited = child.returncode == 0
+    except subprocess.TimeoutExpired:
+        # Kill the parse and page workers it left behind too
+        os.killpg(child.pid, signal.SIGKILL)
+        child.wait()
+        exited = False
+    if not line:
+        return [], None, exited
+    data = json.loads(line)
+    return data['times'], data['blocks'], exited
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=20, help='Pages in the PDF')
+    parser.add_argument('--repeat', type=int, default=3, help='Parses per page worker count')
+    parser.add_argument('--page-workers', type=int, nargs='+', default=[1, 2, 4], help='Counts to compare')
+    parser.add_argument('--exit-timeout', type=float, default=30.0,
+                        help='Seconds a measurement process may take to exit after its last parse')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, 'resume.pdf')
+        build_pdf(pdf_path, args.pages)
+
+        print(f"{os.cpu_count()} CPU cores, {args.pages} pages, {args.repeat} parses each")
+        print(f"{'page workers':>12}{'median ms':>11}{'speedup':>9}  result")
+        failures = 0
+        first_ms = expected = None
+        for page_workers in args.page_workers:
+            times, blocks, exited = measure(pdf_path, page_workers, args.repeat, args.exit_timeout)
+            if blocks is None:
+                print(f"{page_workers:>12}{'-':>11}{'-':>9}  parse failed")
+                failures += 1
+                continue
+            median_ms = percentile(times, 50) * 1000
+            if first_ms is None:
+                first_ms, expected = median_ms, blocks
+            problems = []
+            if blocks != expected:
+                problems.append('blocks differ')
+            if not exited:
+                problems.append('did not exit after shutdown')
+            failures += bool(problems)
+            print(f"{page_workers:>12}{median_ms:>11.0f}{first_ms / median_ms:>8.2f}x  "
+                  f"{', '.join(problems) or 'ok'}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Speed and accuracy benchmark for parse_resume on a synthetic PDF corpus.
+
+Usage:
+    python bench/bench_parse.py run [--count 60] [--seed 0] [--repeat 3]
+                                    [--backend pdfium] [--corpus DIR]
+                                    [--output results.json] [--baseline old.json]
+    python bench/bench_parse.py compare baseline.json current.json
+
+`run` builds (or reuses) the corpus from pdf_corpus.py, then parses every
+PDF from in-memory bytes in a fresh process per backend. It reports latency
+percentiles, throughput, peak RSS and field-level accuracy against the
+ground truth, overall and per corpus variant.
+
+`compare` (or `run --baseline`) exits non-zero when latency, throughput,
+peak memory or accuracy regresses past the given thresholds.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, '..', 'api')
+sys.path.insert(0, API_DIR)
+
+from jobs import percentile  # noqa: E402
+from pdf_corpus import load_or_generate  # noqa: E402
+
+BACKENDS = ['pdfium', 'pdfplumber', 'pdfminer']
+FIELDS = ['company', 'title', 'location', 'dateRange']
+VARIANT_KEYS = ['layout', 'bulletStyle', 'dateFormat', 'jobsPerPage']
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def score_document(truth: List[Dict[str, Any]], parsed: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Count correct fields and bullets for one document.
+
+    Blocks are aligned by position; a missing or extra block counts every
+    one of its fields as wrong. Bullets are matched as a multiset per block.
+    """
+    counts = defaultdict(int)
+    counts['blocks'] = len(truth)
+    counts['blockCountMatch'] = int(len(truth) == len(parsed))
+    for i, expected in enumerate(truth):
+        actual = parsed[i] if i < len(parsed) else {}
+        for field in FIELDS:
+            counts[field] += int(_normalize(actual.get(field, '')) == _normalize(expected[field]))
+
+        expected_bullets = [_normalize(b['text']) for b in expected['bullets']]
+        remaining = [_normalize(b['text']) for b in actual.get('bullets', [])]
+        counts['bulletsExpected'] += len(expected_bullets)
+        counts['bulletsParsed'] += len(remaining)
+        for text in expected_bullets:
+            if text in remaining:
+                remaining.remove(text)
+                counts['bulletsMatched'] += 1
+    counts['bulletsParsed'] += sum(len(b.get('bullets', [])) for b in parsed[len(truth):])
+    return counts
+
+
+def accuracy(counts: Dict[str, int]) -> Dict[str, float]:
+    """Turn summed score_document counts into 0..1 accuracies."""
+    blocks = counts['blocks'] or 1
+    result = {field: counts[field] / blocks for field in FIELDS}
+    precision = counts['bulletsMatched'] / counts['bulletsParsed'] if counts['bulletsParsed'] else 0.0
+    recall = counts['bulletsMatched'] / counts['bulletsExpected'] if counts['bulletsExpected'] else 0.0
+    result['bullets'] = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    result['overall'] = sum(result.values()) / len(result)
+    result['blockCount'] = counts['blockCountMatch'] / (counts['documents'] or 1)
+    return {name: round(value, 4) for name, value in result.items()}
+
+
+def measure(corpus_dir: str, backend: str, repeat: int) -> Dict[str, Any]:
+    """Parse the whole corpus with one backend; runs inside a child process."""
+    import resource
+    from parse import parse_resume
+
+    with open(os.path.join(corpus_dir, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    latencies: List[float] = []
+    totals: Dict[str, int] = defaultdict(int)
+    by_variant: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    errors = 0
+    pages = 0
+
+    started = time.perf_counter()
+    for document in manifest['documents']:
+        with open(os.path.join(corpus_dir, document['file']), 'rb') as f:
+            content = f.read()
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = parse_resume(content, backend=backend)
+            latencies.append(time.perf_counter() - t0)
+        pages += document['pages'] * repeat
+        errors += 'error' in result
+
+        counts = score_document(document['truth'], result.get('blocks', []))
+        counts['documents'] = 1
+        for name, value in counts.items():
+            totals[name] += value
+            for key in VARIANT_KEYS:
+                by_variant[(key, str(document[key]))][name] += value
+    elapsed = time.perf_counter() - started
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    peak = peak if sys.platform == 'darwin' else peak * 1024
+
+    variants: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for (key, value), counts in sorted(by_variant.items()):
+        variants[key][value] = accuracy(counts)['overall']
+
+    return {
+        'documents': len(manifest['documents']),
+        'parses': len(latencies),
+        'errors': errors,
+        'latency': {
+            'p50': round(percentile(latencies, 50), 5),
+            'p90': round(percentile(latencies, 90), 5),
+            'p99': round(percentile(latencies, 99), 5),
+            'max': round(max(latencies), 5),
+        },
+        'throughput': {
+            'docsPerSecond': round(len(latencies) / elapsed, 2),
+            'pagesPerSecond': round(pages / elapsed, 2),
+        },
+        'peakRssMb': round(peak / 2**20, 1),
+        'accuracy': accuracy(totals),
+        'accuracyByVariant': variants,
+    }
+
+
+def run_backend(corpus_dir: str, backend: str, repeat: int) -> Dict[str, Any]:
+    # A fresh process per backend keeps peak RSS comparable between them
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '_measure', corpus_dir, backend, str(repeat)],
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"corpus: {results['corpus']['count']} PDFs, seed {results['corpus']['seed']}, "
+          f"{results['corpus']['pages']} pages")
+    print(f"{'backend':<12}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'docs/s':>9}"
+          f"{'pages/s':>9}{'peak MB':>9}{'accuracy':>10}")
+    for backend, stats in results['backends'].items():
+        latency = stats['latency']
+        print(f"{backend:<12}{latency['p50'] * 1000:>9.1f}{latency['p90'] * 1000:>9.1f}"
+              f"{latency['p99'] * 1000:>9.1f}{stats['throughput']['docsPerSecond']:>9.1f}"
+              f"{stats['throughput']['pagesPerSecond']:>9.1f}{stats['peakRssMb']:>9.1f}"
+              f"{stats['accuracy']['overall']:>10.3f}")
+    for backend, stats in results['backends'].items():
+        fields = ', '.join(f"{name} {value:.3f}" for name, value in stats['accuracy'].items())
+        print(f"\n{backend} accuracy: {fields}")
+        for key, values in stats['accuracyByVariant'].items():
+            print(f"  by {key}: " + ', '.join(f"{value} {score:.3f}" for value, score in values.items()))
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], args: argparse.Namespace) -> int:
+    """Print regressions of current against baseline; return the number found."""
+    if baseline['corpus'] != current['corpus']:
+        print("warning: runs used different corpora, comparison may be meaningless")
+
+    regressions = 0
+    for backend, new in current['backends'].items():
+        old = baseline['backends'].get(backend)
+        if old is None:
+            continue
+        checks = [
+            ('latency p50', old['latency']['p50'], new['latency']['p50'],
+             new['latency']['p50'] > old['latency']['p50'] * (1 + args.max_latency_regression)),
+            ('latency p90', old['latency']['p90'], new['latency']['p90'],
+             new['latency']['p90'] > old['latency']['p90'] * (1 + args.max_latency_regression)),
+            ('docs/s', old['throughput']['docsPerSecond'], new['throughput']['docsPerSecond'],
+             new['throughput']['docsPerSecond'] < old['throughput']['docsPerSecond'] * (1 - args.max_latency_regression)),
+            ('peak MB', old['peakRssMb'], new['peakRssMb'],
+             new['peakRssMb'] > old['peakRssMb'] + args.max_memory_growth_mb),
+        ]
+        for field, value in new['accuracy'].items():
+            before = old['accuracy'].get(field, 0.0)
+            checks.append((f"accuracy {field}", before, value, value < before - args.max_accuracy_drop))
+
+        for name, before, after, failed in checks:
+            regressions += failed
+            status = 'REGRESSION' if failed else 'ok'
+            print(f"{backend:<12}{name:<22}{before:>10.4f} -> {after:<10.4f}{status}")
+    return regressions
+
+
+def _add_thresholds(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--max-latency-regression', type=float, default=0.25,
+                        help='Allowed relative latency increase / throughput drop (default 0.25)')
+    parser.add_argument('--max-memory-growth-mb', type=float, default=32.0,
+                        help='Allowed peak RSS increase in MB (default 32)')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.005,
+                        help='Allowed absolute drop of any accuracy figure (default 0.005)')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Benchmark the parser on the synthetic corpus')
+    run.add_argument('--count', type=int, default=60, help='PDFs in the corpus')
+    run.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    run.add_argument('--repeat', type=int, default=3, help='Parses per PDF')
+    run.add_argument('--backend', action='append', choices=BACKENDS, help='Backend(s) to run (default: all)')
+    run.add_argument('--corpus', help='Directory to keep the corpus in (default: a temporary one)')
+    run.add_argument('--output', help='Write results as JSON to this file')
+    run.add_argument('--baseline', help='Compare against a previous --output file')
+    _add_thresholds(run)
+
+    diff = commands.add_parser('compare', help='Compare two --output files')
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    _add_thresholds(diff)
+
+    measure_cmd = commands.add_parser('_measure')
+    measure_cmd.add_argument('corpus_dir')
+    measure_cmd.add_argument('backend')
+    measure_cmd.add_argument('repeat', type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == '_measure':
+        print(json.dumps(measure(args.corpus_dir, args.backend, args.repeat)))
+        return 0
+
+    if args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        return 1 if compare(baseline, current, args) else 0
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus_dir = args.corpus or workdir
+        manifest = load_or_generate(corpus_dir, args.count, args.seed)
+        results = {
+            'corpus': {
+                'version': manifest['version'],
+                'seed': manifest['seed'],
+                'count': manifest['count'],
+                'pages': sum(document['pages'] for document in manifest['documents']),
+            },
+            'repeat': args.repeat,
+            'backends': {
+                backend: run_backend(corpus_dir, backend, args.repeat)
+                for backend in args.backend or BACKENDS
+            },
+        }
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print()
+        return 1 if compare(baseline, results, args) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
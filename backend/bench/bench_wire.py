@@ -0,0 +1,117 @@
+"""
+Encode/decode time and payload size of resume payloads per wire format.
+
+Usage:
+    python bench/bench_wire.py [--count 200] [--max-jobs 8] [--repeat 5]
+
+Builds --count resumes with pdf_corpus.generate_resume (1 to --max-jobs job
+blocks each, with ids like parser output) and times, per format:
+
+  encode  response body from a dict: FastAPI's default path
+          (jsonable_encoder + JSONResponse) for 'fastapi', wire.dumps for
+          'json', and wire.encode_compact + dumps for 'compact'
+  decode  request body to a validated ResumeData, as the export endpoints do
+
+for a single resume (median over the corpus) and for all of them in one
+batch-style payload. Sizes are raw and gzipped. Exits non-zero if a compact
+round trip does not give back the original payload.
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api'))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from jobs import percentile  # noqa: E402
+from main import ResumeData  # noqa: E402
+from pdf_corpus import DATE_FORMATS, generate_resume  # noqa: E402
+from wire import decode_compact, dumps, encode_compact, loads, orjson  # noqa: E402
+
+
+def with_ids(resume, rng: random.Random):
+    for block in resume['blocks']:
+        block['id'] = str(uuid.UUID(int=rng.getrandbits(128)))
+        for bullet in block['bullets']:
+            bullet['id'] = str(uuid.UUID(int=rng.getrandbits(128)))
+    return resume
+
+
+FORMATS = {
+    'fastapi': (
+        lambda content: JSONResponse(jsonable_encoder(content)).body,
+        loads,
+    ),
+    'json': (dumps, loads),
+    'compact': (
+        lambda content: dumps(encode_compact(content)),
+        lambda body: decode_compact(loads(body)),
+    ),
+}
+
+
+def validate(content) -> None:
+    if 'results' in content:
+        for result in content['results']:
+            ResumeData(**result)
+    else:
+        ResumeData(**content)
+
+
+def timed(function, argument, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200, help='Resumes in the corpus')
+    parser.add_argument('--max-jobs', type=int, default=8, help='Most job blocks per resume')
+    parser.add_argument('--repeat', type=int, default=5, help='Timings per payload (best is kept)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    resumes = [
+        with_ids(generate_resume(i, 1 + i % args.max_jobs, DATE_FORMATS[i % len(DATE_FORMATS)]), rng)
+        for i in range(args.count)
+    ]
+    batch = {'results': resumes}
+
+    mismatches = sum(1 for resume in resumes if decode_compact(encode_compact(resume)) != resume)
+    mismatches += decode_compact(encode_compact(batch)) != batch
+
+    print(f"{args.count} resumes, 1-{args.max_jobs} jobs each; "
+          f"JSON encoder: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'payload':<8}{'format':<9}{'encode ms':>11}{'decode ms':>11}{'bytes':>10}{'gzip':>9}")
+    for label, payloads in (('resume', resumes), ('batch', [batch])):
+        for name, (encode, decode) in FORMATS.items():
+            encode_times, decode_times, sizes, gzip_sizes = [], [], [], []
+            for content in payloads:
+                body = encode(content)
+                encode_times.append(timed(encode, content, args.repeat))
+                decode_times.append(timed(lambda b: validate(decode(b)), body, args.repeat))
+                sizes.append(len(body))
+                gzip_sizes.append(len(gzip.compress(body)))
+            print(f"{label:<8}{name:<9}{percentile(encode_times, 50) * 1000:>11.3f}"
+                  f"{percentile(decode_times, 50) * 1000:>11.3f}"
+                  f"{int(percentile(sizes, 50)):>10}{int(percentile(gzip_sizes, 50)):>9}")
+
+    if mismatches:
+        print(f"{mismatches} compact round trips differ from the original")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Seeded generator of resume PDFs with known ground truth for parser benchmarks.
+
+Each resume is a dict in the shape export.generate_resume_pdf takes (and
+parse_resume returns), rendered in one of two layouts:
+
+- 'export': export.generate_resume_pdf itself, unchanged
+- 'stacked': one field per line (company, date, location, title, bullets),
+  with a chosen bullet marker, a page break every few jobs and optional
+  trailing non-experience pages
+
+Dates are written in one of several formats, so the corpus covers the date
+patterns the parser knows as well as some it does not.
+"""
+import json
+import os
+import random
+import shutil
+import sys
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, '..', 'api')
+
+# Bump whenever generated PDFs change so runs on different corpora are not compared
+CORPUS_VERSION = "1"
+
+LAYOUTS = ['export', 'stacked']
+BULLET_STYLES = ['•', '-', '*', '▪', '●']
+DATE_FORMATS = ['month', 'present', 'year', 'numeric', 'season']
+JOBS_PER_PAGE = [1, 2, 3, 4]
+
+COMPANIES = ['ACME CORPORATION', 'SHOPIFY INC', 'SAMSUNG ELECTRONICS', 'RBC ROYAL BANK',
+             'GOOGLE CANADA', 'IBM CANADA LTD', 'UNIVERSITY OF TORONTO', 'OPEN TEXT CORP',
+             'HYDRO ONE', 'KINAXIS', 'WEALTHSIMPLE', 'TRENT UNIVERSITY']
+TITLES = ['Software Engineering Intern', 'Backend Developer Co-op', 'Data Analyst',
+          'Senior Software Engineer', 'Research Assistant', 'Teaching Assistant',
+          'Machine Learning Engineer', 'Product Designer']
+LOCATIONS = ['Toronto, ON', 'San Francisco, CA', 'Waterloo, ON', 'New York, NY',
+             'Peterborough, ON', 'Vancouver, BC', 'Austin, TX']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+SEASONS = ['Winter', 'Summer', 'Fall']
+VERBS = ['Built', 'Developed', 'Led', 'Designed', 'Improved', 'Reduced', 'Migrated', 'Automated']
+OBJECTS = ['a tracking system for shipments', 'internal dashboards', 'CI pipelines',
+           'the payments API', 'a React frontend', 'ETL jobs in Python', 'Kubernetes clusters',
+           'the onboarding flow', 'search ranking models']
+RESULTS = ['cutting latency by 40%', 'used by 200 engineers', 'saving $1.2M per year',
+           'with zero downtime', 'in three weeks', 'for 5 million users']
+LATER_SECTIONS = ['EDUCATION', 'PROJECTS', 'SKILLS']
+
+
+def _date_range(rng: random.Random, date_format: str) -> str:
+    start_year = rng.randint(2012, 2023)
+    end_year = start_year + rng.randint(0, 2)
+    start = rng.randrange(12)
+    end = rng.randrange(start if end_year == start_year else 0, 12)
+    if date_format == 'month':
+        return f"{MONTHS[start]} {start_year} - {MONTHS[end]} {end_year}"
+    if date_format == 'present':
+        return f"{MONTHS[start]} {start_year} - Present"
+    if date_format == 'year':
+        return f"{start_year} - {end_year}"
+    if date_format == 'numeric':
+        return f"{start + 1:02d}/{start_year} - {end + 1:02d}/{end_year}"
+    return f"{rng.choice(SEASONS)} {start_year}"
+
+
+def generate_resume(seed: int, jobs: int, date_format: str) -> Dict[str, Any]:
+    """Return reproducible ground-truth blocks for one resume."""
+    rng = random.Random(seed)
+    blocks = []
+    for _ in range(jobs):
+        bullets = [
+            {'text': f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(RESULTS)}"}
+            for _ in range(rng.randint(1, 5))
+        ]
+        blocks.append({
+            'company': rng.choice(COMPANIES),
+            'title': rng.choice(TITLES),
+            'location': rng.choice(LOCATIONS),
+            'dateRange': _date_range(rng, date_format),
+            'bullets': bullets,
+        })
+    return {'blocks': blocks}
+
+
+def render_export(resume: Dict[str, Any], path: str) -> None:
+    """Render with export.generate_resume_pdf and move the result to path."""
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    from export import generate_resume_pdf
+
+    shutil.move(generate_resume_pdf(resume), path)
+
+
+def render_stacked(
+    resume: Dict[str, Any],
+    path: str,
+    bullet_style: str,
+    jobs_per_page: int,
+    extra_pages: int,
+) -> None:
+    """Render one field per line, breaking the page every jobs_per_page jobs."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph("JANE DOE", styles['Title']),
+        Paragraph("jane.doe@example.com | (555) 123-4567", styles['Normal']),
+        Paragraph("Work Experience", styles['Heading2']),
+    ]
+    blocks = resume['blocks']
+    for i, block in enumerate(blocks):
+        elements.append(Paragraph(block['company'], styles['Heading3']))
+        elements.append(Paragraph(block['dateRange'], styles['Normal']))
+        elements.append(Paragraph(block['location'], styles['Normal']))
+        elements.append(Paragraph(block['title'], styles['Italic']))
+        for bullet in block['bullets']:
+            elements.append(Paragraph(f"{bullet_style} {bullet['text']}", styles['Normal']))
+        if (i + 1) % jobs_per_page == 0 and i < len(blocks) - 1:
+            elements.append(PageBreak())
+        else:
+            elements.append(Spacer(1, 0.15 * inch))
+
+    for section in LATER_SECTIONS[:extra_pages]:
+        elements.append(PageBreak())
+        elements.append(Paragraph(section, styles['Heading2']))
+        elements.append(Paragraph("Bachelor of Science in Computer Science, 2019 - 2023", styles['Normal']))
+
+    SimpleDocTemplate(path, pagesize=letter).build(elements)
+
+
+def _page_count(path: str) -> int:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def generate_pdf_corpus(directory: str, count: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Write count PDFs plus a manifest.json with each file's variant and ground truth.
+
+    Returns:
+        The manifest
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    documents: List[Dict[str, Any]] = []
+
+    for i in range(count):
+        variant = {
+            'layout': LAYOUTS[i % len(LAYOUTS)],
+            'bulletStyle': rng.choice(BULLET_STYLES),
+            'dateFormat': rng.choice(DATE_FORMATS),
+            'jobsPerPage': rng.choice(JOBS_PER_PAGE),
+            'extraPages': rng.randint(0, 2),
+        }
+        jobs = rng.randint(1, 12)
+        resume = generate_resume(seed * 100000 + i, jobs, variant['dateFormat'])
+        name = f"resume-{i:04d}.pdf"
+        path = os.path.join(directory, name)
+
+        if variant['layout'] == 'export':
+            # generate_resume_pdf has fixed styling and pagination
+            variant.update(bulletStyle='•', jobsPerPage='auto', extraPages=0)
+            render_export(resume, path)
+        else:
+            render_stacked(resume, path, variant['bulletStyle'],
+                           variant['jobsPerPage'], variant['extraPages'])
+
+        documents.append(dict(variant, file=name, pages=_page_count(path), truth=resume['blocks']))
+
+    manifest = {'version': CORPUS_VERSION, 'seed': seed, 'count': count, 'documents': documents}
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def load_or_generate(directory: str, count: int, seed: int = 0) -> Dict[str, Any]:
+    """Reuse the corpus in directory if it matches version, count and seed."""
+    try:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if (manifest['version'], manifest['count'], manifest['seed']) == (CORPUS_VERSION, count, seed):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return generate_pdf_corpus(directory, count, seed)
@@ -0,0 +1,138 @@
+"""
+Local stand-in for the Anthropic Messages API, for exercising analyze.py
+without an API key or network access.
+
+Usage:
+    python bench/stub_anthropic.py [--port 8765] [--latency 0.3] [--jitter 0.1]
+                                   [--error-rate 0.1] [--malformed-rate 0.05]
+
+Then run the backend with ANTHROPIC_BASE_URL=http://127.0.0.1:8765 and any
+ANTHROPIC_API_KEY. POST /v1/messages answers after --latency seconds (plus
+up to --jitter) with a deterministic analysis of every component in the
+prompt (see expected_result). A share of requests fails with a 529
+overloaded or 500 error (--error-rate), or gets a reply that is not JSON
+(--malformed-rate). GET /stats reports request and concurrency counts,
+and POST /reset clears them.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Any, Dict
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def expected_result(component: Dict[str, Any]) -> Dict[str, Any]:
+    """The analysis the stub gives a (normalized) component."""
+    canonical = json.dumps(component, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    score = int(hashlib.sha256(canonical.encode('utf-8')).hexdigest(), 16) % 101
+    return {
+        'score': score,
+        'feedback': f"Stub feedback for a component scoring {score}.",
+        'suggestions': ['Quantify the impact.', 'Lead with a strong verb.'],
+    }
+
+
+def _error(status: int, kind: str, message: str) -> JSONResponse:
+    return JSONResponse({'type': 'error', 'error': {'type': kind, 'message': message}}, status_code=status)
+
+
+def create_app(
+    latency: float = 0.3,
+    jitter: float = 0.1,
+    error_rate: float = 0.0,
+    malformed_rate: float = 0.0,
+    seed: int = 0,
+) -> Starlette:
+    rng = random.Random(seed)
+    counters = {'requests': 0, 'components': 0, 'errors': 0, 'malformed': 0, 'inFlight': 0, 'maxInFlight': 0}
+
+    async def messages(request: Request) -> JSONResponse:
+        body = await request.json()
+        counters['requests'] += 1
+        counters['inFlight'] += 1
+        counters['maxInFlight'] = max(counters['maxInFlight'], counters['inFlight'])
+        try:
+            await asyncio.sleep(latency + rng.random() * jitter)
+
+            roll = rng.random()
+            if roll < error_rate:
+                counters['errors'] += 1
+                if rng.random() < 0.5:
+                    return _error(529, 'overloaded_error', 'Overloaded')
+                return _error(500, 'api_error', 'Internal server error')
+
+            try:
+                items = json.loads(body['messages'][-1]['content'])
+            except (KeyError, IndexError, TypeError, ValueError):
+                return _error(400, 'invalid_request_error', 'Expected a JSON list of components')
+            counters['components'] += len(items)
+
+            if roll < error_rate + malformed_rate:
+                counters['malformed'] += 1
+                text = "I'm sorry, here is my review of your resume in prose."
+            else:
+                results = [dict(expected_result(item['component']), index=item['index']) for item in items]
+                text = json.dumps({'results': results})
+
+            return JSONResponse({
+                'id': f"msg_stub_{counters['requests']}",
+                'type': 'message',
+                'role': 'assistant',
+                'model': body.get('model', 'stub'),
+                'content': [{'type': 'text', 'text': text}],
+                'stop_reason': 'end_turn',
+                'stop_sequence': None,
+                'usage': {'input_tokens': len(body['messages'][-1]['content']) // 4, 'output_tokens': len(text) // 4},
+            })
+        finally:
+            counters['inFlight'] -= 1
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse(counters)
+
+    async def reset(request: Request) -> JSONResponse:
+        for key in counters:
+            if key != 'inFlight':
+                counters[key] = 0
+        return JSONResponse(counters)
+
+    return Starlette(routes=[
+        Route('/v1/messages', messages, methods=['POST']),
+        Route('/stats', stats),
+        Route('/reset', reset, methods=['POST']),
+    ])
+
+
+def serve_in_thread(port: int = 8765, **options: Any) -> uvicorn.Server:
+    """Start the stub on a background thread; returns once it accepts requests."""
+    server = uvicorn.Server(uvicorn.Config(create_app(**options), host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.3, help='Seconds before every reply')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Up to this many extra seconds per reply')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 529/500')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Share of replies that are not JSON')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    app = create_app(args.latency, args.jitter, args.error_rate, args.malformed_rate, args.seed)
+    uvicorn.run(app, host='127.0.0.1', port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()